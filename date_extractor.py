@@ -5,122 +5,224 @@
 
 import re
 from datetime import datetime
-from typing import Optional
+from functools import lru_cache
+from typing import List, Optional, Tuple
 import logging
 
 
 logger = logging.getLogger("media_organizer")
 
 
-def extract_date_from_filename(filename: str) -> Optional[datetime]:
+# Список паттернов для поиска дат (в порядке приоритета):
+# (паттерн, формат, обязательные буквенные префиксы в нижнем регистре или None).
+# Паттерны применяются к имени в нижнем регистре, поэтому буквы в них - строчные.
+# Паттерн None - отдельная группа из ровно 8 цифр: оба формата (YYYYMMDD и DDMMYYYY)
+# используют одно совпадение _EIGHT_DIGIT_RUN, которое ищется один раз.
+#
+# Паттерны намеренно не объединены в одно выражение с именованными группами:
+# альтернация находит самое левое совпадение, а не самое приоритетное, и для
+# сохранения приоритета каждую ветку пришлось бы оборачивать в опережающую
+# проверку от начала имени. Такое выражение оказалось почти вдвое медленнее
+# поочерёдного поиска с ранним выходом: для типичных имён (IMG_..., VID_...)
+# дата находится первым же паттерном, а паттерны с префиксами отсеиваются
+# проверкой подстроки без запуска регулярного выражения.
+_RAW_DATE_PATTERNS = (
+    # IMG_20250823_192714, VID_20250823_192714
+    (r'(?:img|vid|pxl|photo|video|pano)[-_](\d{4})(\d{2})(\d{2})[-_]?(\d{2})?(\d{2})?(\d{2})?', 
+     'YYYYMMDD_HHMMSS', ('img', 'vid', 'pxl', 'photo', 'pano')),
+    
+    # 2025-08-23, 2025_08_23, 2025.08.23, 2025:08:23
+    (r'(\d{4})[-_\.:](\d{2})[-_\.:](\d{2})', 'YYYY-MM-DD', None),
+    
+    # 20250823, только если это отдельная группа
+    (None, 'YYYYMMDD', None),
+    
+    # Screenshot 2025-08-23, Photo 2025_08_23
+    (r'(?:screenshot|photo|image|snap|pic)[-_\s]+(\d{4})[-_\.:](\d{2})[-_\.:](\d{2})', 'YYYY-MM-DD',
+     ('screenshot', 'photo', 'image', 'snap', 'pic')),
+    
+    # 23-08-2025, 23_08_2025, 23.08.2025, 23:08:2025 (день-месяц-год)
+    (r'(\d{2})[-_\.:](\d{2})[-_\.:](\d{4})', 'DD-MM-YYYY', None),
+    
+    # 23082025 (день-месяц-год, только если это отдельная группа)
+    (None, 'DDMMYYYY', None),
+)
+
+
+def _compile_patterns(raw_patterns) -> tuple:
     """
-    Умное извлечение даты из имени файла.
-    Игнорирует случайные последовательности цифр в UUID и хешах.
+    Компилирует паттерны в порядке приоритета.
     
-    Args:
-        filename: Имя файла для анализа
-        
     Returns:
-        Объект datetime или None, если дата не найдена
+        Кортеж (скомпилированное выражение или None, формат, префиксы)
     """
-    # Убираем расширение
-    name_without_ext = filename.rsplit('.', 1)[0]
-    
-    # Список паттернов для поиска дат (в порядке приоритета)
-    date_patterns = [
-        # IMG_20250823_192714, VID_20250823_192714
-        (r'(?:IMG|VID|PXL|PHOTO|VIDEO|PANO)[-_](\d{4})(\d{2})(\d{2})[-_]?(\d{2})?(\d{2})?(\d{2})?', 
-         'YYYYMMDD_HHMMSS'),
-        
-        # 2025-08-23, 2025_08_23, 2025.08.23, 2025:08:23
-        (r'(\d{4})[-_\.:](\d{2})[-_\.:](\d{2})', 'YYYY-MM-DD'),
-        
-        # 20250823, только если это отдельная группа
-        (r'(?<![0-9A-Fa-f])(\d{4})(\d{2})(\d{2})(?![0-9A-Fa-f])', 'YYYYMMDD'),
-        
-        # Screenshot 2025-08-23, Photo 2025_08_23
-        (r'(?:screenshot|photo|image|snap|pic)[-_\s]+(\d{4})[-_\.:](\d{2})[-_\.:](\d{2})', 'YYYY-MM-DD'),
+    return tuple(
+        (re.compile(pattern) if pattern is not None else None, format_type, literals)
+        for pattern, format_type, literals in raw_patterns
+    )
+
+
+def set_pattern_priority(order: List[int]):
+    """
+    Задаёт порядок приоритета паттернов дат.
+    
+    По умолчанию используется порядок _RAW_DATE_PATTERNS. Паттерны проверяются
+    по очереди до первой найденной даты, поэтому если источник коллекции известен
+    заранее (например, сканы с именами YYYY-MM-DD), вызывающий код может поставить
+    нужный паттерн первым, и остальные для таких имён не проверяются вовсе.
+    Порядок также влияет на то, какая дата выбирается, если в имени совпало
+    несколько паттернов.
+    
+    Args:
+        order: Перестановка индексов _RAW_DATE_PATTERNS
         
-        # 23-08-2025, 23_08_2025, 23.08.2025, 23:08:2025 (день-месяц-год)
-        (r'(\d{2})[-_\.:](\d{2})[-_\.:](\d{4})', 'DD-MM-YYYY'),
+    Raises:
+        ValueError: если order не является перестановкой всех индексов
+    """
+    global _DATE_PATTERNS
+    
+    if sorted(order) != list(range(len(_RAW_DATE_PATTERNS))):
+        raise ValueError(f"Некорректный порядок паттернов: {order}")
+    
+    _DATE_PATTERNS = _compile_patterns(tuple(_RAW_DATE_PATTERNS[i] for i in order))
+
+
+# Скомпилированные паттерны в текущем порядке приоритета
+_DATE_PATTERNS = _compile_patterns(_RAW_DATE_PATTERNS)
+
+# Отдельная группа из 8 цифр, не соседствующая с hex-символами
+# (иначе это часть UUID или хеша).
+# Используется стандартный re, а не re2/Hyperscan: здесь нужны ретроспективные
+# и опережающие проверки, которых нет в DFA-движках, а в остальных паттернах нет
+# вложенных квантификаторов, так что поиск по короткому имени и так линейный.
+_EIGHT_DIGIT_RUN = re.compile(r'(?<![0-9A-Fa-f])\d{8}(?![0-9A-Fa-f])')
+
+
+# Любой из паттернов требует минимум 8 цифр (YYYY + MM + DD).
+# Имена с меньшим количеством цифр отбрасываются без запуска основного выражения.
+_MIN_DATE_DIGITS = re.compile(r'(?:\D*\d){8}')
+
+
+def _date_from_groups(format_type: str, groups: Tuple[Optional[str], ...]) -> Optional[datetime]:
+    """
+    Собирает дату из групп совпавшего паттерна.
+    
+    Args:
+        format_type: Формат паттерна ('YYYYMMDD_HHMMSS', 'YYYY-MM-DD', ...)
+        groups: Группы совпадения
         
-        # 23082025 (день-месяц-год, только если это отдельная группа)
-        (r'(?<![0-9A-Fa-f])(\d{2})(\d{2})(\d{4})(?![0-9A-Fa-f])', 'DDMMYYYY'),
-    ]
+    Returns:
+        Объект datetime или None, если дата вне допустимого диапазона.
+        Для несуществующих дат (например, 31 февраля) datetime выбрасывает ValueError.
+    """
+    # Все группы - числа; необязательные группы времени (None) дают 0
+    values = [int(g) if g else 0 for g in groups]
     
-    for pattern, format_type in date_patterns:
-        match = re.search(pattern, name_without_ext, re.IGNORECASE)
-        if match:
-            try:
-                groups = match.groups()
-                
-                if format_type == 'YYYYMMDD_HHMMSS':
-                    year, month, day = int(groups[0]), int(groups[1]), int(groups[2])
-                    # Проверяем валидность даты
-                    if not _is_valid_date(year, month, day):
-                        continue
-                    # Время опционально
-                    hour = int(groups[3]) if groups[3] else 0
-                    minute = int(groups[4]) if groups[4] else 0
-                    second = int(groups[5]) if groups[5] else 0
-                    date_obj = datetime(year, month, day, hour, minute, second)
-                    
-                elif format_type in ['YYYY-MM-DD', 'YYYYMMDD']:
-                    year, month, day = int(groups[0]), int(groups[1]), int(groups[2])
-                    if not _is_valid_date(year, month, day):
-                        continue
-                    date_obj = datetime(year, month, day)
-                    
-                elif format_type in ['DD-MM-YYYY', 'DDMMYYYY']:
-                    day, month, year = int(groups[0]), int(groups[1]), int(groups[2])
-                    if not _is_valid_date(year, month, day):
-                        continue
-                    date_obj = datetime(year, month, day)
-                    
-                else:
-                    continue
-                
-                logger.debug(f"Дата извлечена из имени '{filename}': {date_obj.strftime('%Y-%m-%d %H:%M:%S')}")
-                return date_obj
-                
-            except (ValueError, IndexError) as e:
-                logger.debug(f"Ошибка при разборе даты из '{filename}': {e}")
-                continue
+    year: int
+    month: int
+    day: int
+    hour: int = 0
+    minute: int = 0
+    second: int = 0
     
-    logger.debug(f"Не удалось извлечь дату из имени файла: {filename}")
-    return None
+    if format_type == 'YYYYMMDD_HHMMSS':
+        year, month, day, hour, minute, second = values
+    elif format_type in ('YYYY-MM-DD', 'YYYYMMDD'):
+        year, month, day = values
+    elif format_type in ('DD-MM-YYYY', 'DDMMYYYY'):
+        day, month, year = values
+    else:
+        return None
+    
+    # Проверяем разумный диапазон для фото/видео
+    if not (1900 <= year <= 2099 and 1 <= month <= 12 and 1 <= day <= 31):
+        return None
+    return datetime(year, month, day, hour, minute, second)
 
 
-def _is_valid_date(year: int, month: int, day: int) -> bool:
+def extract_date_from_filename(filename: str) -> Optional[datetime]:
     """
-    Проверяет валидность даты.
+    Умное извлечение даты из имени файла.
+    Игнорирует случайные последовательности цифр в UUID и хешах.
     
     Args:
-        year: Год (должен быть в диапазоне 1900-2099)
-        month: Месяц (1-12)
-        day: День (1-31)
+        filename: Имя файла для анализа
         
     Returns:
-        True, если дата валидна
+        Объект datetime или None, если дата не найдена
     """
-    # Проверяем год (разумный диапазон для фото/видео)
-    if year < 1900 or year > 2099:
-        return False
+    # Убираем расширение (rfind + срез - без создания промежуточного списка)
+    dot: int = filename.rfind('.')
+    name_without_ext: str = filename if dot == -1 else filename[:dot]
+    
+    # Быстрый отсев: в имени недостаточно цифр для даты
+    if not _MIN_DATE_DIGITS.match(name_without_ext):
+        logger.debug("Не удалось извлечь дату из имени файла: %s", filename)
+        return None
     
-    # Проверяем месяц
-    if month < 1 or month > 12:
-        return False
+    # Имя приводится к нижнему регистру один раз - выражения собраны без re.IGNORECASE
+    name_lower = name_without_ext.lower()
+    # Поиск отдельной группы из 8 цифр выполняется только если до неё дошла очередь:
+    # для имён вроде IMG_20250823_192714 дата находится раньше
+    run_match = False
     
-    # Проверяем день
-    if day < 1 or day > 31:
-        return False
+    # Паттерны проверяются в порядке приоритета до первой найденной даты
+    for pattern, format_type, literals in _DATE_PATTERNS:
+        if pattern is None:
+            # Отдельная группа из 8 цифр: YYYY MM DD или DD MM YYYY
+            if run_match is False:
+                run_match = _EIGHT_DIGIT_RUN.search(name_without_ext)
+            if run_match is None:
+                continue
+            run = run_match.group()
+            if format_type == 'YYYYMMDD':
+                groups = (run[:4], run[4:6], run[6:])
+            else:
+                groups = (run[:2], run[2:4], run[4:])
+        else:
+            # Паттерн с буквенным префиксом (IMG_, Screenshot ...) не может совпасть,
+            # если префикса нет в имени: дешёвая проверка подстрок вместо поиска
+            if literals and not any(literal in name_lower for literal in literals):
+                continue
+            match = pattern.search(name_lower)
+            if match is None:
+                continue
+            groups = match.groups()
+        try:
+            date_obj = _date_from_groups(format_type, groups)
+        except (ValueError, IndexError) as e:
+            logger.debug("Ошибка при разборе даты из '%s': %s", filename, e)
+            continue
+        
+        if date_obj is not None:
+            logger.debug("Дата извлечена из имени '%s': %s", filename, date_obj)
+            return date_obj
     
-    # Проверяем, что дата действительно существует (например, 31 февраля - нет)
-    try:
-        datetime(year, month, day)
-        return True
-    except ValueError:
-        return False
+    logger.debug("Не удалось извлечь дату из имени файла: %s", filename)
+    return None
+
+
+# Названия месяцев (индекс = номер месяца - 1)
+MONTH_NAMES = (
+    "Январь",
+    "Февраль",
+    "Март",
+    "Апрель",
+    "Май",
+    "Июнь",
+    "Июль",
+    "Август",
+    "Сентябрь",
+    "Октябрь",
+    "Ноябрь",
+    "Декабрь",
+)
+
+
+@lru_cache(maxsize=4096)
+def _format_folder_names(year: int, month: int, day: int) -> tuple:
+    """Строит имена папок для даты; результат кешируется по (год, месяц, день)."""
+    return str(year), f"{year}.{month:02d}", f"{year}.{month:02d}.{day:02d}"
 
 
 def format_date_for_folder(date_obj: datetime) -> tuple:
@@ -133,26 +235,7 @@ def format_date_for_folder(date_obj: datetime) -> tuple:
     Returns:
         Кортеж (год, "месяц. Название", "день")
     """
-    month_names = {
-        1: "Январь",
-        2: "Февраль",
-        3: "Март",
-        4: "Апрель",
-        5: "Май",
-        6: "Июнь",
-        7: "Июль",
-        8: "Август",
-        9: "Сентябрь",
-        10: "Октябрь",
-        11: "Ноябрь",
-        12: "Декабрь"
-    }
-    
-    year = str(date_obj.year)
-    month = f"{date_obj.year}.{date_obj.month:02d}"
-    day = f"{date_obj.year}.{date_obj.month:02d}.{date_obj.day:02d}"
-    
-    return year, month, day
+    return _format_folder_names(date_obj.year, date_obj.month, date_obj.day)
 
 
 # Примеры использования для тестирования
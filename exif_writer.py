@@ -5,10 +5,12 @@
 """
 
 import os
+import json
 import subprocess
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from tqdm import tqdm
 from colorama import Fore, Style
 
@@ -17,16 +19,77 @@ from metadata_reader import (
     extract_date_from_metadata,
     is_photo,
     is_video,
-    is_media_file,
     get_exiftool_path,
+    ExifToolDaemon,
     PHOTO_EXTENSIONS,
     VIDEO_EXTENSIONS
 )
 
 logger = logging.getLogger("media_organizer")
 
+# Сколько файлов отправляется в exiftool за одну пачку команд
+WRITE_BATCH_SIZE = 200
 
-def write_date_to_photo_exif(file_path: str, date_obj: datetime) -> Tuple[bool, str]:
+# Кеш файлов, в которых уже есть дата в EXIF: {путь: "размер|mtime_ns"}
+EXIF_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "photos_by_date", "exif_dates.json")
+
+# Расширения всех поддерживаемых медиа файлов (в нижнем регистре)
+_MEDIA_EXTENSIONS = frozenset(PHOTO_EXTENSIONS | VIDEO_EXTENSIONS)
+
+# Сколько строк вывода копится перед одной записью в терминал
+OUTPUT_FLUSH_SIZE = 100
+
+# Цветовые префиксы вывода (вычисляются один раз, а не на каждый файл)
+_PB = Fore.BLUE
+_PG = Fore.GREEN
+_PY = Fore.YELLOW
+_PR = Fore.RED
+_PE = Style.RESET_ALL
+
+
+def _photo_date_tags(date_str: str) -> dict:
+    """Теги EXIF фотографии, в которые записывается дата."""
+    return {
+        'DateTimeOriginal': date_str,  # Дата съёмки
+        'CreateDate': date_str,        # Дата создания
+        'ModifyDate': date_str,        # Дата изменения
+    }
+
+
+def _video_date_tags(date_str: str) -> dict:
+    """Теги видео, в которые записывается дата (несколько - для максимальной совместимости)."""
+    return {
+        'QuickTime:CreateDate': date_str,
+        'QuickTime:MediaCreateDate': date_str,
+        'QuickTime:TrackCreateDate': date_str,
+        'Keys:CreationDate': date_str,
+    }
+
+
+def _run_exiftool_write(exiftool_path: str, file_path: str, tags: dict,
+                        exiftool: Optional[ExifToolDaemon] = None) -> Tuple[bool, str]:
+    """
+    Записывает теги в файл через запущенный ExifToolDaemon или отдельный процесс exiftool.
+    
+    Returns:
+        Кортеж (успех, вывод ошибок exiftool)
+    """
+    if exiftool is not None:
+        return exiftool.write_tags(file_path, tags)
+    
+    result = subprocess.run(
+        [exiftool_path, '-overwrite_original']
+        + [f'-{tag}={value}' for tag, value in tags.items()]
+        + [file_path],
+        capture_output=True,
+        text=True,
+        timeout=30
+    )
+    return result.returncode == 0, result.stderr
+
+
+def write_date_to_photo_exif(file_path: str, date_obj: datetime,
+                             exiftool: Optional[ExifToolDaemon] = None) -> Tuple[bool, str]:
     """
     Записывает дату создания в EXIF фотографии используя exiftool.
     Это безопасный метод, который сохраняет все существующие EXIF данные и качество изображения.
@@ -34,6 +97,7 @@ def write_date_to_photo_exif(file_path: str, date_obj: datetime) -> Tuple[bool,
     Args:
         file_path: Путь к файлу фотографии
         date_obj: Объект datetime для записи
+        exiftool: Запущенный ExifToolDaemon (если None - запускается отдельный процесс)
         
     Returns:
         Кортеж (успех, сообщение об ошибке)
@@ -42,54 +106,43 @@ def write_date_to_photo_exif(file_path: str, date_obj: datetime) -> Tuple[bool,
     if not exiftool_path:
         return False, "exiftool не найден"
     
-    if not os.path.exists(file_path):
-        return False, f"Файл не найден: {file_path}"
-    
     try:
         # Форматируем дату в формат EXIF: "YYYY:MM:DD HH:MM:SS"
         date_str = date_obj.strftime("%Y:%m:%d %H:%M:%S")
         
         # Записываем дату в EXIF теги используя exiftool
         # Это безопасно - exiftool не изменяет само изображение, только метаданные
-        result = subprocess.run(
-            [
-                exiftool_path,
-                '-overwrite_original',  # Не создавать backup файлы
-                f'-DateTimeOriginal={date_str}',  # Дата съёмки
-                f'-CreateDate={date_str}',        # Дата создания
-                f'-ModifyDate={date_str}',        # Дата изменения
-                file_path
-            ],
-            capture_output=True,
-            text=True,
-            timeout=30
+        success, error_output = _run_exiftool_write(
+            exiftool_path, file_path, _photo_date_tags(date_str), exiftool
         )
         
-        if result.returncode != 0:
-            error_msg = f"exiftool вернул ошибку: {result.stderr}"
-            logger.error(f"{error_msg} ({file_path})")
+        if not success:
+            error_msg = f"exiftool вернул ошибку: {error_output}"
+            logger.error("%s (%s)", error_msg, file_path)
             return False, error_msg
         
-        logger.info(f"EXIF дата записана: {file_path} -> {date_str}")
+        logger.info("EXIF дата записана: %s -> %s", file_path, date_str)
         return True, ""
         
     except subprocess.TimeoutExpired:
         error_msg = "Таймаут при записи EXIF"
-        logger.error(f"{error_msg} ({file_path})")
+        logger.error("%s (%s)", error_msg, file_path)
         return False, error_msg
     except Exception as e:
         error_msg = f"Ошибка записи EXIF: {str(e)}"
-        logger.error(f"{error_msg} ({file_path})")
+        logger.error("%s (%s)", error_msg, file_path)
         return False, error_msg
 
 
-def write_date_to_video_metadata(file_path: str, date_obj: datetime) -> Tuple[bool, str]:
+def write_date_to_video_metadata(file_path: str, date_obj: datetime,
+                                 exiftool: Optional[ExifToolDaemon] = None) -> Tuple[bool, str]:
     """
     Записывает дату создания в метаданные видео используя exiftool.
     
     Args:
         file_path: Путь к видео файлу
         date_obj: Объект datetime для записи
+        exiftool: Запущенный ExifToolDaemon (если None - запускается отдельный процесс)
         
     Returns:
         Кортеж (успех, сообщение об ошибке)
@@ -98,69 +151,213 @@ def write_date_to_video_metadata(file_path: str, date_obj: datetime) -> Tuple[bo
     if not exiftool_path:
         return False, "exiftool не найден"
     
-    if not os.path.exists(file_path):
-        return False, f"Файл не найден: {file_path}"
-    
     try:
         # Форматируем дату в формат exiftool: "YYYY:MM:DD HH:MM:SS"
         date_str = date_obj.strftime("%Y:%m:%d %H:%M:%S")
         
         # Записываем дату в несколько тегов для максимальной совместимости
-        result = subprocess.run(
-            [
-                exiftool_path,
-                '-overwrite_original',  # Не создавать backup файлы
-                f'-QuickTime:CreateDate={date_str}',
-                f'-QuickTime:MediaCreateDate={date_str}',
-                f'-QuickTime:TrackCreateDate={date_str}',
-                f'-Keys:CreationDate={date_str}',
-                file_path
-            ],
-            capture_output=True,
-            text=True,
-            timeout=30
+        success, error_output = _run_exiftool_write(
+            exiftool_path, file_path, _video_date_tags(date_str), exiftool
         )
         
-        if result.returncode != 0:
-            error_msg = f"exiftool вернул ошибку: {result.stderr}"
-            logger.error(f"{error_msg} ({file_path})")
+        if not success:
+            error_msg = f"exiftool вернул ошибку: {error_output}"
+            logger.error("%s (%s)", error_msg, file_path)
             return False, error_msg
         
-        logger.info(f"Метаданные видео записаны: {file_path} -> {date_str}")
+        logger.info("Метаданные видео записаны: %s -> %s", file_path, date_str)
         return True, ""
         
     except subprocess.TimeoutExpired:
         error_msg = "Таймаут при записи метаданных видео"
-        logger.error(f"{error_msg} ({file_path})")
+        logger.error("%s (%s)", error_msg, file_path)
         return False, error_msg
     except Exception as e:
         error_msg = f"Ошибка записи метаданных видео: {str(e)}"
-        logger.error(f"{error_msg} ({file_path})")
+        logger.error("%s (%s)", error_msg, file_path)
         return False, error_msg
 
 
-def write_date_to_file(file_path: str, date_obj: datetime) -> Tuple[bool, str]:
+def _path_and_name(file: Union[str, os.DirEntry]) -> Tuple[str, str]:
+    """Возвращает (путь, имя файла); для DirEntry - без дополнительных вызовов."""
+    if isinstance(file, os.DirEntry):
+        return file.path, file.name
+    return file, os.path.basename(file)
+
+
+def write_date_to_file(file: Union[str, os.DirEntry], date_obj: datetime,
+                       exiftool: Optional[ExifToolDaemon] = None) -> Tuple[bool, str]:
     """
     Универсальная функция для записи даты в файл.
     Автоматически определяет тип файла и использует соответствующий метод.
+    Существование файла заранее не проверяется - ошибку вернёт exiftool.
     
     Args:
-        file_path: Путь к медиа файлу
+        file: Путь к медиа файлу или DirEntry из _iter_media
         date_obj: Объект datetime для записи
+        exiftool: Запущенный ExifToolDaemon (если None - запускается отдельный процесс)
         
     Returns:
         Кортеж (успех, сообщение об ошибке)
     """
-    filename = os.path.basename(file_path)
+    file_path, filename = _path_and_name(file)
     
     if is_photo(filename):
-        return write_date_to_photo_exif(file_path, date_obj)
+        return write_date_to_photo_exif(file_path, date_obj, exiftool)
     elif is_video(filename):
-        return write_date_to_video_metadata(file_path, date_obj)
+        return write_date_to_video_metadata(file_path, date_obj, exiftool)
     else:
         return False, f"Неподдерживаемый тип файла: {filename}"
 
 
+def write_dates_batch(items: List[Tuple[Union[str, os.DirEntry], datetime]],
+                      exiftool: ExifToolDaemon) -> List[Tuple[bool, str]]:
+    """
+    Записывает даты в несколько файлов за одну отправку команд в exiftool.
+    
+    Args:
+        items: Список (путь_к_файлу или DirEntry, дата)
+        exiftool: Запущенный ExifToolDaemon
+        
+    Returns:
+        Список (успех, сообщение об ошибке) в порядке items
+    """
+    results = [None] * len(items)
+    batch = []
+    batch_indices = []
+    
+    for i, (file, date_obj) in enumerate(items):
+        file_path, filename = _path_and_name(file)
+        date_str = date_obj.strftime("%Y:%m:%d %H:%M:%S")
+        if is_photo(filename):
+            tags = _photo_date_tags(date_str)
+        elif is_video(filename):
+            tags = _video_date_tags(date_str)
+        else:
+            results[i] = (False, f"Неподдерживаемый тип файла: {filename}")
+            continue
+        batch.append((file_path, tags))
+        batch_indices.append((i, date_str))
+    
+    if not batch:
+        return results
+    
+    try:
+        batch_results = exiftool.write_tags_batch(batch)
+    except Exception as e:
+        error_msg = f"Ошибка записи метаданных: {str(e)}"
+        logger.error(error_msg)
+        batch_results = [(False, error_msg)] * len(batch)
+    
+    for (i, date_str), (file_path, _), (success, error_output) in zip(batch_indices, batch, batch_results):
+        if success:
+            logger.info("Дата записана: %s -> %s", file_path, date_str)
+            results[i] = (True, "")
+        else:
+            error_msg = f"exiftool вернул ошибку: {error_output}"
+            logger.error("%s (%s)", error_msg, file_path)
+            results[i] = (False, error_msg)
+    
+    return results
+
+
+def _iter_media(directory_path: str, recursive: bool):
+    """
+    Перебирает медиа файлы в директории через os.scandir.
+    
+    Тип записи берётся из DirEntry (без лишних stat), расширение сравнивается
+    с заранее подготовленным множеством. Символические ссылки на папки,
+    как и в os.walk, не обходятся.
+    
+    Yields:
+        DirEntry медиа файлов (путь, имя и stat без повторных системных вызовов)
+    """
+    stack = [directory_path]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError as e:
+            # os.walk молча пропускал недоступные папки - сохраняем это поведение
+            logger.warning("Не удалось прочитать папку %s: %s", current, e)
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if recursive and not entry.is_symlink():
+                        stack.append(entry.path)
+                elif entry.is_file():
+                    name = entry.name
+                    dot = name.rfind('.')
+                    if dot > 0 and name[dot:].lower() in _MEDIA_EXTENSIONS:
+                        yield entry
+
+
+def _load_exif_cache(cache_path: str) -> Dict[str, str]:
+    """
+    Загружает кеш файлов, в которых уже есть дата в EXIF.
+    
+    Returns:
+        Словарь {абсолютный_путь: "размер|mtime_ns"}; пустой, если кеша нет или он повреждён
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        return cache if isinstance(cache, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_exif_cache(cache_path: str, cache: Dict[str, str]):
+    """Сохраняет кеш файлов с датой в EXIF."""
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False)
+    except OSError as e:
+        logger.warning("Не удалось сохранить кеш EXIF %s: %s", cache_path, e)
+
+
+def _file_cache_key(file: Union[str, os.DirEntry]) -> Optional[str]:
+    """Ключ актуальности файла для кеша: размер и время изменения."""
+    try:
+        # DirEntry.stat() кеширует результат и не делает повторный вызов
+        st = file.stat() if isinstance(file, os.DirEntry) else os.stat(file)
+    except OSError:
+        return None
+    return f"{st.st_size}|{st.st_mtime_ns}"
+
+
+def _check_file(entry: os.DirEntry, exif_cache: Dict[str, str]) -> Tuple[bool, Optional[datetime], Optional[str]]:
+    """
+    Проверяет файл перед записью даты. Вызывается из пула потоков.
+    
+    Args:
+        entry: DirEntry медиа файла
+        exif_cache: Кеш файлов с датой в EXIF (только чтение)
+    
+    Returns:
+        Кортеж (есть_дата_в_EXIF, дата_из_имени_или_None, новый_ключ_для_кеша_или_None)
+    """
+    # 1. Сначала дешёвый разбор имени файла: если даты в имени нет,
+    #    записывать нечего и читать метаданные не нужно
+    file_path = entry.path
+    date_from_name = extract_date_from_filename(entry.name)
+    if not date_from_name:
+        return False, None, None
+    
+    # 2. Файл не менялся с прошлого запуска, и дата в EXIF у него уже была
+    cache_key = _file_cache_key(entry)
+    if cache_key is not None and exif_cache.get(os.path.abspath(file_path)) == cache_key:
+        return True, None, None
+    
+    # 3. Проверяем, есть ли уже дата в EXIF
+    if extract_date_from_metadata(file_path):
+        return True, None, cache_key
+    
+    return False, date_from_name, None
+
+
 def scan_and_update_exif(directory_path: str, logger_obj, recursive: bool = True) -> dict:
     """
     Сканирует директорию и обновляет EXIF даты из имён файлов.
@@ -188,20 +385,7 @@ def scan_and_update_exif(directory_path: str, logger_obj, recursive: bool = True
     }
     
     # Собираем все медиа файлы
-    media_files = []
-    all_extensions = PHOTO_EXTENSIONS | VIDEO_EXTENSIONS
-    
-    if recursive:
-        for root, dirs, files in os.walk(directory_path):
-            for filename in files:
-                if is_media_file(filename):
-                    file_path = os.path.join(root, filename)
-                    media_files.append(file_path)
-    else:
-        for filename in os.listdir(directory_path):
-            file_path = os.path.join(directory_path, filename)
-            if os.path.isfile(file_path) and is_media_file(filename):
-                media_files.append(file_path)
+    media_files = list(_iter_media(directory_path, recursive))
     
     if not media_files:
         logger_obj.warning(f"Не найдено медиа файлов в {directory_path}")
@@ -228,7 +412,9 @@ def scan_and_update_exif(directory_path: str, logger_obj, recursive: bool = True
     
     print("Обработка файлов:\n")
     
-    with tqdm(total=stats['total'],
+    # Один процесс exiftool (-stay_open) на весь проход вместо запуска на каждый файл
+    with ExifToolDaemon() as exiftool, \
+         tqdm(total=stats['total'],
               unit=' файл',
               desc="Прогресс",
               bar_format=bar_format,
@@ -236,48 +422,100 @@ def scan_and_update_exif(directory_path: str, logger_obj, recursive: bool = True
               leave=True,
               colour='green') as pbar:
         
-        for idx, file_path in enumerate(media_files, 1):
+        # Файлы, ожидающие записи: (idx, путь, дата из имени)
+        pending = []
+        
+        # Кеш файлов, в которых дата в EXIF уже есть (переживает перезапуски)
+        exif_cache = _load_exif_cache(EXIF_CACHE_PATH)
+        
+        # Строки вывода, которые печатаются одним вызовом tqdm.write
+        output_lines = []
+        total = stats['total']
+        
+        def flush_output():
+            """Печатает накопленные строки одной записью в терминал."""
+            if output_lines:
+                tqdm.write("\n".join(output_lines))
+                output_lines.clear()
+        
+        def add_output(line):
+            """Добавляет строку в буфер вывода."""
+            output_lines.append(line)
+            if len(output_lines) >= OUTPUT_FLUSH_SIZE:
+                flush_output()
+        
+        def flush_pending():
+            """Записывает накопленные даты одной пачкой и выводит результаты."""
+            if not pending:
+                return
+            results = write_dates_batch(
+                [(file_path, date_obj) for _, file_path, date_obj in pending], exiftool
+            )
+            for (idx, file_path, date_from_name), (success, error_msg) in zip(pending, results):
+                if success:
+                    stats['updated'] += 1
+                    cache_key = _file_cache_key(file_path)
+                    if cache_key is not None:
+                        exif_cache[os.path.abspath(file_path)] = cache_key
+                    logger_obj.info("[%d/%d] Обновлён: %s -> %s", idx, total, file_path, date_from_name)
+                    short_path = file_path if len(file_path) <= 60 else "..." + file_path[-57:]
+                    add_output(
+                        f"{_PB}{idx}/{total}{_PE} "
+                        f"{short_path} {_PG}→ {date_from_name:%Y-%m-%d}{_PE}"
+                    )
+                else:
+                    stats['errors'] += 1
+                    logger_obj.error("[%d/%d] Ошибка: %s (%s)", idx, total, error_msg, file_path)
+                    # Ошибки печатаются сразу, после уже накопленных строк
+                    add_output(f"{_PR}⚠️  Ошибка: {os.path.basename(file_path)}: {error_msg}{_PE}")
+                    flush_output()
+                pbar.update(1)
+            pending.clear()
+
+        def process_checked_file(idx, file_path, has_date, date_from_name, cache_key):
+            """Учитывает результат проверки файла и ставит его в очередь на запись."""
             filename = os.path.basename(file_path)
             pbar.set_description(f"Обработка: {filename}")
-            
-            # 1. Проверяем, есть ли уже дата в EXIF
-            existing_date = extract_date_from_metadata(file_path)
-            if existing_date:
+
+            # 1. Дата уже есть в EXIF
+            if has_date:
+                if cache_key is not None:
+                    exif_cache[os.path.abspath(file_path)] = cache_key
                 stats['skipped_has_date'] += 1
-                logger_obj.debug(f"[{idx}/{stats['total']}] Пропущен (есть EXIF): {file_path}")
+                logger_obj.debug("[%d/%d] Пропущен (есть EXIF): %s", idx, total, file_path)
                 pbar.update(1)
-                continue
-            
-            # 2. Извлекаем дату из имени файла
-            date_from_name = extract_date_from_filename(filename)
+                return
+
+            # 2. В имени файла нет даты
             if not date_from_name:
                 stats['skipped_no_date_in_name'] += 1
-                logger_obj.debug(f"[{idx}/{stats['total']}] Пропущен (нет даты в имени): {file_path}")
+                logger_obj.debug("[%d/%d] Пропущен (нет даты в имени): %s", idx, total, file_path)
                 short_path = file_path if len(file_path) <= 60 else "..." + file_path[-57:]
-                tqdm.write(
-                    f"{Fore.BLUE}{idx}/{stats['total']}{Style.RESET_ALL} "
-                    f"{short_path} {Fore.YELLOW}[Нет даты в имени]{Style.RESET_ALL}"
-                )
+                add_output(f"{_PB}{idx}/{total}{_PE} {short_path} {_PY}[Нет даты в имени]{_PE}")
                 pbar.update(1)
-                continue
-            
-            # 3. Записываем дату в EXIF
-            success, error_msg = write_date_to_file(file_path, date_from_name)
-            
-            if success:
-                stats['updated'] += 1
-                logger_obj.info(f"[{idx}/{stats['total']}] Обновлён: {file_path} -> {date_from_name.strftime('%Y-%m-%d %H:%M:%S')}")
-                short_path = file_path if len(file_path) <= 60 else "..." + file_path[-57:]
-                tqdm.write(
-                    f"{Fore.BLUE}{idx}/{stats['total']}{Style.RESET_ALL} "
-                    f"{short_path} {Fore.GREEN}→ {date_from_name.strftime('%Y-%m-%d')}{Style.RESET_ALL}"
-                )
-            else:
-                stats['errors'] += 1
-                logger_obj.error(f"[{idx}/{stats['total']}] Ошибка: {error_msg} ({file_path})")
-                tqdm.write(f"{Fore.RED}⚠️  Ошибка: {filename}: {error_msg}{Style.RESET_ALL}")
-            
-            pbar.update(1)
+                return
+
+            # 3. Откладываем запись даты - файлы записываются пачками
+            pending.append((idx, file_path, date_from_name))
+            if len(pending) >= WRITE_BATCH_SIZE:
+                flush_pending()
+
+        # Чтение метаданных идёт параллельно в пуле потоков (exiftool - отдельный процесс,
+        # поэтому GIL не мешает), запись дат - в основном потоке через общий ExifToolDaemon
+        with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
+            futures = {
+                executor.submit(_check_file, entry, exif_cache): (idx, entry.path)
+                for idx, entry in enumerate(media_files, 1)
+            }
+
+            for future in as_completed(futures):
+                idx, file_path = futures[future]
+                has_date, date_from_name, cache_key = future.result()
+                process_checked_file(idx, file_path, has_date, date_from_name, cache_key)
+
+        flush_pending()
+        flush_output()
+        _save_exif_cache(EXIF_CACHE_PATH, exif_cache)
     
     # Выводим итоговую статистику
     print(f"\n{'='*60}")
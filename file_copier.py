@@ -1,7 +1,20 @@
 import os
+import sys
+import errno
 import shutil
 import logging
-from typing import Set, Tuple, Optional, List
+import threading
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Iterator, Set, Tuple, Optional, List
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: ioctl недоступен, reflink не используется
+    fcntl = None
 
 # --- Импорты из других модулей ---
 # Для корректной работы требуется, чтобы в metadata_reader.py были определены 
@@ -23,14 +36,40 @@ except ImportError:
 # --- Константы и Логгер ---
 logger = logging.getLogger("media_organizer")
 ALL_MEDIA_EXTENSIONS = PHOTO_EXTENSIONS.union(VIDEO_EXTENSIONS)
+# Те же расширения в нижнем регистре - готовы для сравнения без пересчёта на каждый вызов
+_ALL_MEDIA_EXT_LOWER = frozenset(sys.intern(ext.lower()) for ext in ALL_MEDIA_EXTENSIONS)
+# Кортеж для str.endswith: проверка всех суффиксов за один вызов на C
+_EXT_TUPLE = tuple(sorted(_ALL_MEDIA_EXT_LOWER))
+_EXT_TUPLE_UPPER = tuple(ext.upper() for ext in _EXT_TUPLE)
+# Те же суффиксы в байтах - для обхода с байтовыми именами
+_EXT_TUPLE_BYTES = tuple(os.fsencode(ext) for ext in _EXT_TUPLE)
+_EXT_TUPLE_BYTES_UPPER = tuple(os.fsencode(ext) for ext in _EXT_TUPLE_UPPER)
+# Суффиксы видео - для определения типа файла при обходе
+_VIDEO_EXT_TUPLE_BYTES = tuple(sorted(os.fsencode(ext.lower()) for ext in VIDEO_EXTENSIONS))
+_VIDEO_EXT_TUPLE_BYTES_UPPER = tuple(ext.upper() for ext in _VIDEO_EXT_TUPLE_BYTES)
 UNKNOWN_DATE_FOLDER = "Дата неизвестна"
 
+# Число потоков копирования: операции ввода-вывода, поэтому больше, чем ядер
+COPY_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+# Содержимое папок назначения: (точные имена, ключи _name_key) существующих файлов
+# плюс имён, уже выданных _get_unique_filename. Заполняется одним os.scandir при
+# первом обращении к папке, дальше дубликаты проверяются без системных вызовов.
+# Блокировки папок нужны, чтобы два потока не выбрали один суффикс (-1, -2, ...)
+_dir_contents_cache: Dict[str, Tuple[Set[str], Set[str]]] = {}
+_folder_locks: Dict[str, threading.Lock] = defaultdict(threading.Lock)
+_folder_locks_guard = threading.Lock()
+
+# Папки назначения, уже созданные за время работы процесса
+_created_dirs: Set[str] = set()
+_created_dirs_lock = threading.Lock()
+
 
 def is_exact_day_folder(folder_name: str) -> bool:
     """Проверяет, соответствует ли имя папки ТОЧНО формату 'YYYY.MM.DD'."""
-    # Имя должно быть в формате YYYY.MM.DD (10 символов)
-    parts = folder_name.split('.')
-    return len(parts) == 3 and all(p.isdigit() for p in parts) and len(folder_name) == 10
+    return (len(folder_name) == 10 and folder_name[4] == '.' and folder_name[7] == '.'
+            and folder_name[:4].isdecimal() and folder_name[5:7].isdecimal()
+            and folder_name[8:].isdecimal())
 
 
 def starts_with_day_date(folder_name: str) -> bool:
@@ -38,22 +77,21 @@ def starts_with_day_date(folder_name: str) -> bool:
     Проверяет, начинается ли имя папки с даты 'YYYY.MM.DD'.
     Например: '2025.01.06' или '2023.08.13 тверской полумарафон'.
     """
-    if len(folder_name) < 10:
-        return False
-    
-    prefix = folder_name[:10]
-    parts = prefix.split('.')
-    return len(parts) == 3 and all(p.isdigit() for p in parts)
+    # Сначала дешёвые проверки разделителей, затем цифры в срезах
+    return (len(folder_name) >= 10 and folder_name[4] == '.' and folder_name[7] == '.'
+            and folder_name[:4].isdecimal() and folder_name[5:7].isdecimal()
+            and folder_name[8:10].isdecimal())
 
 
 def is_year_folder(folder_name: str) -> bool:
     """Проверяет, является ли папка годом (4 цифры)."""
-    return len(folder_name) == 4 and folder_name.isdigit()
+    return len(folder_name) == 4 and folder_name.isdecimal()
 
 
 def is_month_folder(folder_name: str) -> bool:
     """Проверяет, является ли папка месяцем (YYYY.MM)."""
-    return len(folder_name) == 7 and folder_name.replace('.', '').isdigit() and folder_name[4] == '.'
+    return (len(folder_name) == 7 and folder_name[4] == '.'
+            and folder_name[:4].isdecimal() and folder_name[5:].isdecimal())
 
 
 def validate_paths(source_path: str, destination_path: str) -> Tuple[bool, Optional[str]]:
@@ -71,7 +109,7 @@ def validate_paths(source_path: str, destination_path: str) -> Tuple[bool, Optio
     if not os.path.exists(destination_path):
         try:
             os.makedirs(destination_path)
-            logger.info(f"Создана папка назначения: {destination_path}")
+            logger.info("Создана папка назначения: %s", destination_path)
         except Exception as e:
             return False, f"Ошибка: Не удалось создать папку назначения {destination_path}. {e}"
     elif not os.path.isdir(destination_path):
@@ -80,9 +118,15 @@ def validate_paths(source_path: str, destination_path: str) -> Tuple[bool, Optio
     return True, None
 
 
-def get_all_media_files(source_path: str, extensions: Set[str] = ALL_MEDIA_EXTENSIONS, skip_organized: bool = False) -> List[str]:
+def iter_media_entries(source_path: str, extensions: Set[str] = _ALL_MEDIA_EXT_LOWER,
+                       skip_organized: bool = False) -> Iterator[Tuple[str, str, str]]:
     """
-    Рекурсивно получает список всех медиафайлов в исходной папке.
+    Рекурсивно перебирает медиафайлы в исходной папке вместе с именем и типом.
+    
+    Тип файла ('photo' или 'video') определяется один раз при обходе,
+    чтобы дальше не разбирать расширение повторно.
+    Файлы выдаются по мере обхода, поэтому обработку можно начинать,
+    не дожидаясь окончания сканирования всего дерева.
     
     Args:
         source_path: Путь к исходной папке.
@@ -90,61 +134,432 @@ def get_all_media_files(source_path: str, extensions: Set[str] = ALL_MEDIA_EXTEN
         skip_organized: Если True, пропускает файлы в уже организованных папках 
                         (Root/YYYY/YYYY.MM/YYYY.MM.DD...).
         
-    Returns:
-        Список полных путей к медиафайлам.
+    Yields:
+        Кортежи (полный_путь, имя_файла, тип).
     """
-    media_files = []
-    
     # Расширения должны быть в нижнем регистре для корректного сравнения
-    lower_extensions = {ext.lower() for ext in extensions}
+    if extensions is _ALL_MEDIA_EXT_LOWER or extensions is ALL_MEDIA_EXTENSIONS:
+        ext_tuple, ext_tuple_upper = _EXT_TUPLE_BYTES, _EXT_TUPLE_BYTES_UPPER
+    else:
+        lower = sorted({ext.lower() for ext in extensions})
+        ext_tuple = tuple(os.fsencode(ext) for ext in lower)
+        ext_tuple_upper = tuple(os.fsencode(ext.upper()) for ext in lower)
+    
+    video_tuple, video_tuple_upper = _VIDEO_EXT_TUPLE_BYTES, _VIDEO_EXT_TUPLE_BYTES_UPPER
     
-    # Нормализуем путь источника для корректного сравнения
-    abs_source_path = os.path.abspath(source_path)
+    # Локальные ссылки для горячего цикла
+    is_day_folder = starts_with_day_date
+    fsdecode = os.fsdecode
+    
+    # Обход через os.scandir: тип записи берётся из DirEntry без дополнительных
+    # stat, полный путь - из entry.path без os.path.join.
+    # Порядок как у os.walk: сначала файлы папки, затем подпапки.
+    # Папки читаются с байтовыми именами: фильтр по расширению - сравнение байт,
+    # а в строку декодируются только пути подходящих файлов.
+    #
+    # Если папка похожа на день (YYYY.MM.DD...) и мы в режиме skip_organized
+    # (Source == Destination), то пропускаем файлы, лежащие прямо в ней; вложенные
+    # папки обходятся как обычно. Это предотвращает повторную обработку уже
+    # организованных папок, а также папок с событиями (2023.08.13 Event),
+    # которые пользователь хочет оставить как есть.
+    # Для самой папки источника имя берётся так же, как его дал бы os.walk.
+    stack = [(os.fsencode(source_path),
+              skip_organized and is_day_folder(os.path.basename(source_path)))]
+    while stack:
+        path, skip_files = stack.pop()
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    name = entry.name
+                    if entry.is_dir():
+                        # Символические ссылки на папки, как и в os.walk, не обходятся
+                        if not entry.is_symlink():
+                            subdirs.append((entry.path,
+                                            skip_organized and is_day_folder(fsdecode(name))))
+                        continue
+                    
+                    if skip_files:
+                        continue
+                    
+                    # Игнорируем скрытые файлы (начинаются с '.')
+                    if name.startswith(b'.'):
+                        continue
+                    
+                    # Сравниваем окончание имени со всеми расширениями сразу - без
+                    # os.path.splitext. Имена камер обычно целиком в одном регистре
+                    # (IMG_0001.JPG, photo.jpg), поэтому копия имени в нижнем
+                    # регистре создаётся только для смешанного регистра (.Jpg)
+                    if (name.endswith(ext_tuple) or name.endswith(ext_tuple_upper)
+                            or name.lower().endswith(ext_tuple)):
+                        # Тип записи уже известен из DirEntry (stat нужен только
+                        # для символических ссылок): сокеты, FIFO и битые ссылки
+                        # с "медийным" расширением не попадают в копирование
+                        if entry.is_file():
+                            is_video = (name.endswith(video_tuple) or name.endswith(video_tuple_upper)
+                                        or name.lower().endswith(video_tuple))
+                            files.append((fsdecode(entry.path), fsdecode(name),
+                                          'video' if is_video else 'photo'))
+        except OSError as e:
+            # os.walk молча пропускал недоступные папки - сохраняем это поведение
+            logger.warning("Не удалось прочитать папку %s: %s", fsdecode(path), e)
+            continue
+        
+        yield from files
+        # В обратном порядке, чтобы первая подпапка была обойдена первой
+        stack.extend(reversed(subdirs))
 
-    for root, _, files in os.walk(source_path):
-        # Проверяем, нужно ли пропускать эту папку
-        if skip_organized:
-            current_folder_name = os.path.basename(root)
-            
-            # Если папка похожа на день (YYYY.MM.DD...)
-            # И мы в режиме skip_organized (Source == Destination), то мы пропускаем
-            # ЛЮБУЮ папку, которая выглядит как папка дня.
-            # Это предотвращает повторную обработку уже организованных папок,
-            # а также папок с событиями (2023.08.13 Event), которые пользователь хочет оставить как есть.
-            if starts_with_day_date(current_folder_name):
-                continue
+
+def iter_media_files(source_path: str, extensions: Set[str] = _ALL_MEDIA_EXT_LOWER, skip_organized: bool = False) -> Iterator[str]:
+    """
+    Рекурсивно перебирает медиафайлы в исходной папке.
+    
+    Args:
+        source_path: Путь к исходной папке.
+        extensions: Множество допустимых расширений файлов.
+        skip_organized: Если True, пропускает файлы в уже организованных папках 
+                        (Root/YYYY/YYYY.MM/YYYY.MM.DD...).
         
-        for file in files:
-            # Игнорируем скрытые файлы (начинаются с '.')
-            if file.startswith('.'):
-                continue
-            
-            # Получаем расширение и приводим к нижнему регистру
-            ext = os.path.splitext(file)[1].lower()
-            
-            if ext in lower_extensions:
-                full_path = os.path.join(root, file)
-                media_files.append(full_path)
-                
-    return media_files
+    Yields:
+        Полные пути к медиафайлам.
+    """
+    for file_path, _, _ in iter_media_entries(source_path, extensions, skip_organized):
+        yield file_path
+
+
+def get_all_media_files(source_path: str, extensions: Set[str] = _ALL_MEDIA_EXT_LOWER, skip_organized: bool = False) -> List[str]:
+    """
+    Рекурсивно получает список всех медиафайлов в исходной папке.
+    
+    Args:
+        source_path: Путь к исходной папке.
+        extensions: Множество допустимых расширений файлов.
+        skip_organized: Если True, пропускает файлы в уже организованных папках 
+                        (Root/YYYY/YYYY.MM/YYYY.MM.DD...).
+        
+    Returns:
+        Список полных путей к медиафайлам.
+    """
+    return list(iter_media_files(source_path, extensions, skip_organized))
+
+
+def _ensure_folder(folder: str):
+    """
+    Создаёт папку назначения, если она ещё не создавалась в этом процессе.
+    Сотни файлов обычно попадают в одну папку дня, поэтому os.makedirs
+    вызывается один раз на папку, а не на каждый файл.
+    """
+    if folder in _created_dirs:
+        return
+    try:
+        os.makedirs(folder)
+        # Папка только что создана - она пуста, читать её содержимое не нужно
+        with _folder_lock(folder):
+            _dir_contents_cache.setdefault(folder, (set(), set()))
+    except FileExistsError:
+        pass
+    with _created_dirs_lock:
+        _created_dirs.add(folder)
+
+
+def reset_dir_cache():
+    """Сбрасывает кеш созданных папок и их содержимого (например, если папки менялись извне)."""
+    with _created_dirs_lock:
+        _created_dirs.clear()
+    with _folder_locks_guard:
+        _dir_contents_cache.clear()
+
+
+def _name_key(filename: str) -> str:
+    """
+    Ключ имени без учёта регистра и формы Unicode (NFC/NFD).
+    Совпадение ключей - только повод спросить файловую систему (_name_taken):
+    macOS считает 'IMG.JPG' и 'img.jpg' одним именем, Linux - разными.
+    """
+    return unicodedata.normalize('NFC', filename).casefold()
+
+
+def _dir_names(folder: str) -> Tuple[Set[str], Set[str]]:
+    """
+    Возвращает (точные имена, ключи имён) папки (вызывать под _folder_lock).
+    При первом обращении содержимое читается одним os.scandir.
+    """
+    names = _dir_contents_cache.get(folder)
+    if names is None:
+        try:
+            with os.scandir(folder) as entries:
+                exact = {entry.name for entry in entries}
+        except FileNotFoundError:
+            exact = set()
+        names = (exact, {_name_key(name) for name in exact})
+        _dir_contents_cache[folder] = names
+    return names
+
+
+def _add_name(names: Tuple[Set[str], Set[str]], filename: str):
+    """Добавляет имя в кеш содержимого папки (вызывать под _folder_lock)."""
+    names[0].add(filename)
+    names[1].add(_name_key(filename))
+
+
+def _name_taken(folder: str, names: Tuple[Set[str], Set[str]], filename: str) -> bool:
+    """
+    Проверяет, занято ли имя в папке, так же, как os.path.exists.
+    Точное совпадение решается по кешу. Если имя отличается от занятого только
+    регистром или формой Unicode, ответ зависит от файловой системы, поэтому
+    в этом (редком) случае выполняется os.path.exists.
+    """
+    exact, keys = names
+    if filename in exact:
+        return True
+    return _name_key(filename) in keys and os.path.exists(os.path.join(folder, filename))
+
+
+def _remember_filename(folder: str, filename: str):
+    """Добавляет имя в кеш содержимого папки, если папка уже в кеше."""
+    with _folder_lock(folder):
+        names = _dir_contents_cache.get(folder)
+        if names is not None:
+            _add_name(names, filename)
+
+
+def _folder_lock(folder: str) -> threading.Lock:
+    """Возвращает блокировку папки назначения (создаёт при первом обращении)."""
+    with _folder_locks_guard:
+        return _folder_locks[folder]
 
 
 def _get_unique_filename(destination_folder: str, original_filename: str) -> str:
     """
     Внутренняя функция: Генерирует уникальное имя файла в папке назначения, 
     добавляя счетчик (-1, -2, ...) перед расширением, если файл уже существует.
+    
+    Существующие имена берутся из кеша содержимого папки (один os.scandir
+    на папку вместо os.path.exists на каждую попытку). Выданное имя сразу
+    добавляется в кеш, поэтому функцию можно вызывать из нескольких потоков.
     """
     name, ext = os.path.splitext(original_filename)
     unique_name = original_filename
     counter = 1
     
-    while os.path.exists(os.path.join(destination_folder, unique_name)):
-        unique_name = f"{name}-{counter}{ext}"
-        counter += 1
+    with _folder_lock(destination_folder):
+        names = _dir_names(destination_folder)
+        while _name_taken(destination_folder, names, unique_name):
+            unique_name = f"{name}-{counter}{ext}"
+            counter += 1
+        _add_name(names, unique_name)
         
     return unique_name
 
 
+def _release_filename(destination_folder: str, filename: str):
+    """Убирает имя из кеша содержимого папки, если файл так и не был записан."""
+    with _folder_lock(destination_folder):
+        names = _dir_contents_cache.get(destination_folder)
+        if names is not None:
+            # Ключ остаётся: лишний ключ стоит лишь одного os.path.exists
+            names[0].discard(filename)
+
+
+# Ошибки copy_file_range, при которых копирование выполняется через shutil.copy2:
+# разные файловые системы (на старых ядрах), нет поддержки в ядре или ФС
+_COPY_FILE_RANGE_FALLBACK_ERRNOS = frozenset(
+    code for code in (
+        errno.EXDEV, errno.ENOSYS, errno.EINVAL,
+        getattr(errno, 'EOPNOTSUPP', None), getattr(errno, 'ENOTSUP', None),
+    ) if code is not None
+)
+
+# Копирование через reflink (ioctl FICLONE): на btrfs/XFS/bcachefs копия
+# создаётся мгновенно и без копирования данных - блоки общие до первого изменения
+USE_REFLINK = True
+_FICLONE = 0x40049409
+
+# Ошибки FICLONE, означающие "reflink здесь невозможен": разные ФС,
+# ФС без поддержки, ioctl не поддерживается
+_REFLINK_FALLBACK_ERRNOS = _COPY_FILE_RANGE_FALLBACK_ERRNOS | {errno.ENOTTY}
+
+# Пары устройств (источник, назначение), для которых уже проверен reflink:
+# {(st_dev источника, st_dev назначения): поддерживается}
+_reflink_devices: Dict[Tuple[int, int], bool] = {}
+
+
+def _try_reflink(src_fd: int, dst_fd: int) -> bool:
+    """
+    Пробует создать копию через reflink (FICLONE).
+    Результат запоминается для пары устройств и пишется в лог один раз.
+    
+    Returns:
+        True, если копия создана
+    """
+    if not USE_REFLINK or fcntl is None:
+        return False
+    devices = (os.fstat(src_fd).st_dev, os.fstat(dst_fd).st_dev)
+    if _reflink_devices.get(devices) is False:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, _FICLONE, src_fd)
+    except OSError as e:
+        if e.errno not in _REFLINK_FALLBACK_ERRNOS:
+            raise
+        if devices not in _reflink_devices:
+            logger.info("Reflink недоступен (устройства %s -> %s): %s", devices[0], devices[1], e)
+        _reflink_devices[devices] = False
+        return False
+    if devices not in _reflink_devices:
+        logger.info("Копирование через reflink (устройства %s -> %s)", devices[0], devices[1])
+        _reflink_devices[devices] = True
+    return True
+
+
+def _kernel_copy(src_fd: int, dst_fd: int):
+    """
+    Копирует данные внутри ядра: os.copy_file_range, а если он не
+    поддерживается - os.sendfile (без копирования через память процесса).
+    
+    Raises:
+        OSError: если не работает ни один из способов
+    """
+    try:
+        while os.copy_file_range(src_fd, dst_fd, 1 << 30):
+            pass
+        return
+    except OSError as e:
+        if e.errno not in _COPY_FILE_RANGE_FALLBACK_ERRNOS:
+            raise
+    # offset=None: чтение с текущей позиции источника, позиции обоих файлов
+    # совпадают и после частично выполненного copy_file_range
+    while os.sendfile(dst_fd, src_fd, None, 1 << 30):
+        pass
+
+
+def _fast_copy(src: str, dst: str) -> str:
+    """
+    Копирует файл средствами ядра и переносит метаданные как shutil.copy2.
+    
+    Порядок: reflink (FICLONE) - мгновенная копия на btrfs/XFS;
+    os.copy_file_range - копирование в ядре (на NFS 4.2 - на стороне сервера);
+    os.sendfile. Если ничего не поддерживается, используется shutil.copy2.
+    """
+    try:
+        src_fd = os.open(src, os.O_RDONLY)
+        try:
+            dst_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+            try:
+                if not _try_reflink(src_fd, dst_fd):
+                    _kernel_copy(src_fd, dst_fd)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+    except OSError as e:
+        if e.errno not in _COPY_FILE_RANGE_FALLBACK_ERRNOS:
+            raise
+        return shutil.copy2(src, dst)
+    
+    shutil.copystat(src, dst)
+    return dst
+
+
+# copy_file_range есть только в Linux (Python 3.8+); на macOS shutil.copy2
+# и так использует fcopyfile.
+# Отдельный бэкенд на io_uring не используется: копия одного файла здесь - это
+# open + один FICLONE/copy_file_range + close, данные в процесс не читаются,
+# а одновременность обеспечивают потоки копирования. Пакетная отправка SQE
+# сократила бы только число переключений в ядро, но потребовала бы внешней
+# зависимости (liburing) и отдельного пути без fallback на другие ОС.
+_copy_file = _fast_copy if hasattr(os, 'copy_file_range') else shutil.copy2
+
+
+def _move_file(src: str, dst: str) -> str:
+    """
+    Перемещает файл. В пределах одного диска это одно переименование
+    (os.rename), между разными дисками - копирование через _copy_file и удаление.
+    """
+    try:
+        os.rename(src, dst)
+        return dst
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    return shutil.move(src, dst, copy_function=_copy_file)
+
+
+def _is_same_path(path_a: str, path_b: str) -> bool:
+    """
+    Проверяет, указывают ли два пути на одно место.
+    Пути из iter_media_files обычно уже абсолютные - тогда хватает сравнения
+    строк, и os.path.abspath (с вызовом os.getcwd) не нужен.
+    """
+    if path_a == path_b:
+        return True
+    if os.path.isabs(path_a) and os.path.isabs(path_b):
+        return os.path.normpath(path_a) == os.path.normpath(path_b)
+    return os.path.abspath(path_a) == os.path.abspath(path_b)
+
+
+@lru_cache(maxsize=None)
+def _dest_parts(destination_path: str) -> Tuple[str, str]:
+    """
+    Разбирает корневую папку назначения (одна и та же для всех файлов прохода).
+    
+    Returns:
+        Кортеж (путь без завершающего разделителя, имя папки)
+    """
+    seps = os.sep + (os.altsep or '')
+    return destination_path.rstrip(seps), os.path.basename(os.path.normpath(destination_path))
+
+
+# Компоненты год/месяц/день формируются программой и не бывают абсолютными путями,
+# поэтому пути склеиваются через os.sep.join без проверок os.path.join
+
+def _target_folder_day(destination_path: str, year: str, month: str, day: Optional[str]) -> str:
+    """Папка назначения для группировки Год/Месяц/День."""
+    # Проверка на двойную вложенность года или месяца
+    prefix, dest_basename = _dest_parts(destination_path)
+    if dest_basename == month:
+        # Если мы уже в папке месяца (например, 2023.08), создаем только папку дня
+        return os.sep.join((prefix, day))
+    elif dest_basename == year:
+        # Если мы уже в папке года, не создаем подпапку года
+        return os.sep.join((prefix, month, day))
+    # Стандартное поведение
+    return os.sep.join((prefix, year, month, day))
+
+
+def _target_folder_month(destination_path: str, year: str, month: str, day: Optional[str]) -> str:
+    """Папка назначения для группировки Год/Месяц."""
+    # Проверка на двойную вложенность года или месяца
+    prefix, dest_basename = _dest_parts(destination_path)
+    if dest_basename == month:
+        # Мы уже в нужной папке
+        return destination_path
+    elif dest_basename == year:
+        # Если мы уже в папке года, не создаем подпапку года
+        return os.sep.join((prefix, month))
+    # Стандартное поведение
+    return os.sep.join((prefix, year, month))
+
+
+def _target_folder_func(grouping: str):
+    """
+    Выбирает функцию построения папки назначения для режима группировки.
+    Режим одинаков для всего прохода, поэтому выбор делается один раз.
+    
+    Если grouping = 'day' или 'smart' (что приводит к 'day' в логике media_organizer),
+    используем Год/Месяц/День, иначе Год/Месяц.
+    """
+    if grouping == 'day' or grouping == 'smart':
+        return _target_folder_day
+    return _target_folder_month
+
+
+def _get_target_folder(destination_path: str, year: str, month: str, day: Optional[str], grouping: str) -> str:
+    """Формирует папку назначения для даты с учётом режима группировки."""
+    return _target_folder_func(grouping)(destination_path, year, month, day)
+
+
 def copy_file_to_destination(
     file_path: str, 
     destination_path: str, 
@@ -173,39 +588,14 @@ def copy_file_to_destination(
     filename = os.path.basename(file_path)
     
     # Формируем папку назначения
-    # Если grouping = 'day' или 'smart' (что приводит к 'day' в логике media_organizer),
-    # используем Год/Месяц/День.
-    
-    # Проверка на двойную вложенность года или месяца
-    dest_basename = os.path.basename(os.path.normpath(destination_path))
-    
-    if dest_basename == month:
-        # Если мы уже в папке месяца (например, 2023.08), создаем только папку дня
-        if grouping == 'day' or grouping == 'smart':
-            target_folder = os.path.join(destination_path, day)
-        else: # grouping == 'month'
-            # Мы уже в нужной папке
-            target_folder = destination_path
-            
-    elif dest_basename == year:
-        # Если мы уже в папке года, не создаем подпапку года
-        if grouping == 'day' or grouping == 'smart':
-            target_folder = os.path.join(destination_path, month, day)
-        else: # grouping == 'month'
-            target_folder = os.path.join(destination_path, month)
-    else:
-        # Стандартное поведение
-        if grouping == 'day' or grouping == 'smart':
-            target_folder = os.path.join(destination_path, year, month, day)
-        else: # grouping == 'month'
-            target_folder = os.path.join(destination_path, year, month)
+    target_folder = _get_target_folder(destination_path, year, month, day, grouping)
 
     # Создаем папку, если она не существует
     try:
-        os.makedirs(target_folder, exist_ok=True)
+        _ensure_folder(target_folder)
     except Exception as e:
         error_msg = f"Ошибка создания папки {target_folder}: {e}"
-        logger.error(f"Файл: {filename}. {error_msg}")
+        logger.error("Файл: %s. %s", filename, error_msg)
         # Возвращаем False, None, error_msg
         return False, None, error_msg 
 
@@ -213,14 +603,15 @@ def copy_file_to_destination(
     target_filename = _get_unique_filename(target_folder, filename)
     target_file_path = os.path.join(target_folder, target_filename)
     
-    operation = shutil.move if move else shutil.copy2
+    operation = _move_file if move else _copy_file
     operation_name = "Перемещение" if move else "Копирование"
 
     try:
         # Проверяем, не является ли файл сам собой в случае перемещения
-        if move and os.path.abspath(file_path) == os.path.abspath(target_file_path):
+        if move and _is_same_path(file_path, target_file_path):
             log_msg = "Пропущено (идентичный файл, перемещение не требуется)"
-            logger.info(f"Файл: {filename}. {log_msg}")
+            logger.info("Файл: %s. %s", filename, log_msg)
+            _release_filename(target_folder, target_filename)
             # Возвращаем False, None, log_msg
             return False, None, log_msg 
             
@@ -232,13 +623,14 @@ def copy_file_to_destination(
         else:
             log_msg = f"{operation_name} в {target_folder}"
             
-        logger.info(f"Файл: {filename}. {log_msg}")
+        logger.info("Файл: %s. %s", filename, log_msg)
         # Возвращаем True, target_file_path, None
         return True, target_file_path, None 
         
     except Exception as e:
         error_msg = f"Ошибка {operation_name.lower()} файла: {e}"
-        logger.error(f"Файл: {filename}. {error_msg}")
+        logger.error("Файл: %s. %s", filename, error_msg)
+        _release_filename(target_folder, target_filename)
         # Возвращаем False, None, error_msg
         return False, None, error_msg 
 
@@ -261,24 +653,25 @@ def copy_file_no_date(file_path: str, destination_path: str, move: bool) -> Tupl
     
     # Создаем папку, если она не существует
     try:
-        os.makedirs(target_folder, exist_ok=True)
+        _ensure_folder(target_folder)
     except Exception as e:
         error_msg = f"Ошибка создания папки {target_folder}: {e}"
-        logger.error(f"Файл: {filename}. {error_msg}")
+        logger.error("Файл: %s. %s", filename, error_msg)
         return False, None, error_msg
 
     # Обрабатываем дубликаты
     target_filename = _get_unique_filename(target_folder, filename)
     target_file_path = os.path.join(target_folder, target_filename)
     
-    operation = shutil.move if move else shutil.copy2
+    operation = _move_file if move else _copy_file
     operation_name = "Перемещение" if move else "Копирование"
 
     try:
         # Проверяем, не является ли файл сам собой в случае перемещения
-        if move and os.path.abspath(file_path) == os.path.abspath(target_file_path):
+        if move and _is_same_path(file_path, target_file_path):
             log_msg = "Пропущено (идентичный файл, перемещение не требуется)"
-            logger.info(f"Файл: {filename}. {log_msg}")
+            logger.info("Файл: %s. %s", filename, log_msg)
+            _release_filename(target_folder, target_filename)
             return False, None, log_msg
 
         operation(file_path, target_file_path)
@@ -289,18 +682,107 @@ def copy_file_no_date(file_path: str, destination_path: str, move: bool) -> Tupl
         else:
             log_msg = f"{operation_name} в '{UNKNOWN_DATE_FOLDER}'"
             
-        logger.info(f"Файл: {filename}. {log_msg}")
+        logger.info("Файл: %s. %s", filename, log_msg)
         return True, target_file_path, None
         
     except Exception as e:
         error_msg = f"Ошибка {operation_name.lower()} файла: {e}"
-        logger.error(f"Файл: {filename}. {error_msg}")
+        logger.error("Файл: %s. %s", filename, error_msg)
+        _release_filename(target_folder, target_filename)
         return False, None, error_msg
 
+def copy_files_batch(
+    jobs: List[Tuple[str, str, Optional[str], Optional[str], Optional[str]]],
+    move: bool,
+    grouping: str,
+    workers: int = COPY_WORKERS
+) -> Iterator[Tuple[int, Tuple[bool, Optional[str], Optional[str]]]]:
+    """
+    Копирует или перемещает несколько файлов параллельно в пуле потоков.
+    
+    Копирование блокируется на системных вызовах, поэтому несколько потоков
+    держат диск занятым, пока один ждёт. Все папки назначения создаются
+    заранее в одном потоке, чтобы потоки не конкурировали на os.makedirs.
+    
+    Args:
+        jobs: Список (путь_к_файлу, папка_назначения, год, месяц, день).
+              Если год равен None, файл уходит в папку 'Дата неизвестна'.
+        move: True для перемещения, False для копирования.
+        grouping: 'day', 'month' или 'smart'.
+        workers: Число потоков.
+        
+    Yields:
+        Кортежи (индекс_задания, результат copy_file_to_destination) по мере завершения
+    """
+    # Создаём все папки назначения заранее (каждую - один раз)
+    target_folder_for = _target_folder_func(grouping)
+    target_folders = set()
+    for _, destination_path, year, month, day in jobs:
+        if year is None:
+            target_folders.add(os.path.join(destination_path, UNKNOWN_DATE_FOLDER))
+        else:
+            target_folders.add(target_folder_for(destination_path, year, month, day))
+    for target_folder in target_folders:
+        try:
+            _ensure_folder(target_folder)
+        except OSError:
+            # Ошибку вернёт copy_file_to_destination для каждого файла этой папки
+            pass
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for idx, (file_path, destination_path, year, month, day) in enumerate(jobs):
+            if year is None:
+                future = executor.submit(copy_file_no_date, file_path, destination_path, move)
+            else:
+                future = executor.submit(
+                    copy_file_to_destination, file_path, destination_path,
+                    year, month, day, move, grouping
+                )
+            futures[future] = idx
+        
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
 # --- НОВЫЕ ФУНКЦИИ ДЛЯ УМНОЙ СОРТИРОВКИ ---
 
 
 
+def _replace_month_with_day(month_path: str, day_folder_name: str) -> bool:
+    """
+    Заменяет папку Месяца её единственной папкой Дня без переноса файлов:
+    Месяц -> временное имя, временное/День -> Месяц, удаление пустой временной папки.
+    
+    Returns:
+        True, если замена выполнена; False, если быстрый путь неприменим
+        (папка Дня - символическая ссылка или временное имя занято).
+        
+    Raises:
+        OSError: если переименование не удалось (исходное состояние восстанавливается)
+    """
+    day_path = os.path.join(month_path, day_folder_name)
+    tmp_path = month_path + '.__restruct__'
+    if os.path.islink(day_path) or os.path.lexists(tmp_path):
+        return False
+    
+    os.rename(month_path, tmp_path)
+    try:
+        os.rename(os.path.join(tmp_path, day_folder_name), month_path)
+    except OSError:
+        # Возвращаем папку Месяца на место
+        os.rename(tmp_path, month_path)
+        raise
+    try:
+        os.rmdir(tmp_path)
+    except OSError as e:
+        # Замена уже выполнена; во временной папке появилось что-то после
+        # проверки (например, .DS_Store) - оставляем её пользователю
+        logger.warning("Папка '%s' объединена, но временная папка '%s' не удалена: %s",
+                       month_path, tmp_path, e)
+    return True
+
+
 def restructure_for_smart_mode(destination_path: str, logger: logging.Logger) -> int:
     """
     Выполняет второй проход умной сортировки.
@@ -315,34 +797,31 @@ def restructure_for_smart_mode(destination_path: str, logger: logging.Logger) ->
     """
     restructured_count = 0
     
+    # Все уровни обходятся через os.scandir: тип записи берётся из DirEntry,
+    # без отдельного os.path.isdir на каждый элемент
+    
     # 1. Обход на уровне Года
-    for year_folder_name in os.listdir(destination_path):
-        year_path = os.path.join(destination_path, year_folder_name)
+    with os.scandir(destination_path) as entries:
         # Проверяем, что это папка и похоже на год (4 цифры)
-        if not os.path.isdir(year_path) or not year_folder_name.isdigit() or len(year_folder_name) != 4:
-            continue
-
+        year_paths = [e.path for e in entries if is_year_folder(e.name) and e.is_dir()]
+    
+    for year_path in year_paths:
         # 2. Обход на уровне Месяца
-        for month_folder_name in os.listdir(year_path):
-            month_path = os.path.join(year_path, month_folder_name)
-            # Проверяем, что это папка
-            if not os.path.isdir(month_path):
-                continue
-                
+        with os.scandir(year_path) as entries:
             # Проверяем, что папка месяца соответствует формату "YYYY.MM"
-            if not (len(month_folder_name) == 7 and month_folder_name.replace('.', '').isdigit() and month_folder_name[4] == '.'):
-                continue
-
-            # 3. Проверка содержимого папки Месяца
-            all_items = os.listdir(month_path)
-            
-            # Выделяем только папки, которые могут быть папками Дня ("DD")
-            day_folders = [d for d in all_items 
-                          if os.path.isdir(os.path.join(month_path, d)) and is_exact_day_folder(d)]
-            
-            # Определяем, есть ли другие элементы (файлы, не-DD папки) в папке Месяца
-            other_items = [item for item in all_items 
-                           if not (os.path.isdir(os.path.join(month_path, item)) and is_exact_day_folder(item))]
+            month_paths = [e.path for e in entries if is_month_folder(e.name) and e.is_dir()]
+        
+        for month_path in month_paths:
+            # 3. Проверка содержимого папки Месяца за один проход:
+            # папки Дня ("YYYY.MM.DD") и все остальные элементы (файлы, другие папки)
+            day_folders = []
+            other_items = []
+            with os.scandir(month_path) as entries:
+                for entry in entries:
+                    if is_exact_day_folder(entry.name) and entry.is_dir():
+                        day_folders.append(entry.name)
+                    else:
+                        other_items.append(entry.name)
             
             # Критерий умной сортировки: Внутри папки Месяца есть ТОЛЬКО ОДНА папка "Дня"
             # и НЕТ ДРУГИХ ФАЙЛОВ/ПАПОК, которые могли бы помешать удалению Day_folder.
@@ -350,10 +829,17 @@ def restructure_for_smart_mode(destination_path: str, logger: logging.Logger) ->
                 day_folder_name = day_folders[0]
                 day_path = os.path.join(month_path, day_folder_name)
                 
-                logger.info(f"Обнаружен кандидат на объединение: {day_path} -> {month_path}")
+                logger.info("Обнаружен кандидат на объединение: %s -> %s", day_path, month_path)
 
                 try:
-                    # 4. Перемещение содержимого "Дня" в "Месяц"
+                    # 4. Папка Месяца содержит только папку Дня - подменяем одну папку
+                    #    другой двумя переименованиями вместо переноса каждого файла
+                    if _replace_month_with_day(month_path, day_folder_name):
+                        logger.info("Успешно объединено: папка '%s' переименована в '%s'", day_folder_name, month_path)
+                        restructured_count += 1
+                        continue
+                    
+                    # Перемещение содержимого "Дня" в "Месяц" по одному элементу
                     for item_name in os.listdir(day_path):
                         src_item = os.path.join(day_path, item_name)
                         dst_item = os.path.join(month_path, item_name)
@@ -363,17 +849,22 @@ def restructure_for_smart_mode(destination_path: str, logger: logging.Logger) ->
                             # Если есть конфликт, переименовываем
                             unique_name = _get_unique_filename(month_path, item_name)
                             dst_item = os.path.join(month_path, unique_name)
-                            logger.warning(f"Конфликт имён при объединении. '{item_name}' переименован в '{unique_name}'")
+                            logger.warning("Конфликт имён при объединении. '%s' переименован в '%s'", item_name, unique_name)
                         
                         shutil.move(src_item, dst_item)
+                        _remember_filename(month_path, os.path.basename(dst_item))
                         
                     # 5. Удаление пустой папки "Дня"
                     os.rmdir(day_path)
                     
-                    logger.info(f"Успешно объединено: папка '{day_folder_name}' удалена, файлы перемещены в '{month_path}'")
+                    logger.info("Успешно объединено: папка '%s' удалена, файлы перемещены в '%s'", day_folder_name, month_path)
                     restructured_count += 1
                     
                 except Exception as e:
-                    logger.error(f"Ошибка при объединении папки {day_path} в {month_path}: {e}")
+                    logger.error("Ошибка при объединении папки %s в %s: %s", day_path, month_path, e)
+    
+    # Папки дней удалены - кеш созданных папок больше не актуален
+    if restructured_count:
+        reset_dir_cache()
                     
     return restructured_count
\ No newline at end of file
@@ -3,15 +3,88 @@
 Обеспечивает запись в файл и вывод в консоль.
 """
 
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
 from datetime import datetime
 
 
+# Фоновый поток, который пишет записи лога в файл и консоль
+_queue_listener = None
+
+# Размер буфера файла лога
+LOG_BUFFER_SIZE = 64 * 1024
+
+
+class BufferedFileHandler(logging.FileHandler):
+    """
+    Файловый обработчик с буфером записи.
+    
+    Стандартный FileHandler сбрасывает поток после каждой записи (один
+    системный вызов write на строку лога). Здесь записи копятся в буфере
+    LOG_BUFFER_SIZE и сбрасываются при заполнении, при закрытии
+    и сразу для WARNING и выше, чтобы ошибки не терялись при сбое.
+    """
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_SIZE,
+                    encoding=self.encoding)
+    
+    def emit(self, record):
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+            if record.levelno >= logging.WARNING:
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler, который кладёт запись в очередь без форматирования.
+    
+    Стандартный QueueHandler.prepare() форматирует сообщение (record.msg % args)
+    в вызывающем потоке. Очередь здесь внутрипроцессная, поэтому запись
+    передаётся как есть и форматируется в потоке QueueListener. Аргументы
+    логирования должны быть неизменяемыми (строки, числа, даты) - так они
+    и передаются во всех модулях.
+    """
+    
+    def prepare(self, record):
+        return record
+
+
+def stop_logger():
+    """
+    Останавливает фоновую запись лога, дописывает оставшиеся записи
+    и закрывает файл лога.
+    Вызывается автоматически при выходе из программы.
+    """
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        # Сбрасываем буфер файлового обработчика и освобождаем дескриптор
+        for handler in _queue_listener.handlers:
+            handler.flush()
+            handler.close()
+        _queue_listener = None
+
+
+atexit.register(stop_logger)
+
+
 def setup_logger(name: str = "media_organizer") -> logging.Logger:
     """
     Настраивает и возвращает логгер с записью в файл и консоль.
     
+    Логгер только кладёт записи в очередь (DeferredQueueHandler), а форматирование
+    и запись в файл выполняются в фоновом потоке (QueueListener), чтобы
+    потоки копирования не ждали друг друга на блокировке обработчика.
+    
     Args:
         name: Имя логгера
         
@@ -31,7 +104,10 @@ def setup_logger(name: str = "media_organizer") -> logging.Logger:
     logger.setLevel(logging.DEBUG)
     
     # Очищаем существующие обработчики (если есть)
+    stop_logger()
     if logger.handlers:
+        for handler in logger.handlers:
+            handler.close()
         logger.handlers.clear()
     
     # Формат для логов
@@ -45,16 +121,23 @@ def setup_logger(name: str = "media_organizer") -> logging.Logger:
     )
     
     # Обработчик для файла (DEBUG и выше)
-    file_handler = logging.FileHandler(log_filename, encoding='utf-8')
+    file_handler = BufferedFileHandler(log_filename, encoding='utf-8', delay=True)
     file_handler.setLevel(logging.DEBUG)
     file_handler.setFormatter(file_formatter)
-    logger.addHandler(file_handler)
     
     # Обработчик для консоли (только WARNING и выше, чтобы не мешать прогресс-бару)
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.WARNING)
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    
+    # Записи уходят в очередь, обработчики работают в отдельном потоке
+    global _queue_listener
+    log_queue = queue.Queue(-1)
+    logger.addHandler(DeferredQueueHandler(log_queue))
+    _queue_listener = logging.handlers.QueueListener(
+        log_queue, file_handler, console_handler, respect_handler_level=True
+    )
+    _queue_listener.start()
     
     # Не выводим это сообщение в консоль, только в файл
     logger.debug(f"Логирование настроено. Лог сохраняется в: {log_filename}")
@@ -9,8 +9,12 @@
 import os
 import sys
 import time
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
 from datetime import datetime
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from tqdm import tqdm
 from colorama import Fore, Style, init
@@ -18,18 +22,21 @@ from colorama import Fore, Style, init
 # Инициализируем colorama для поддержки цветов в Windows
 init(autoreset=True)
 
-from logger_config import setup_logger, LoggerStats
+from logger_config import setup_logger, stop_logger, LoggerStats
+from metadata_cache import MetadataCache
 from date_extractor import extract_date_from_filename, format_date_for_folder
 from metadata_reader import (
     extract_date_from_metadata, 
-    is_media_file, 
-    PHOTO_EXTENSIONS, 
+    extract_dates_from_videos_batch,
+    get_exiftool_path,
+    ExifToolDaemon,
+    PIL_AVAILABLE,
+    _ext,
     VIDEO_EXTENSIONS
 )
 from file_copier import (
-    copy_file_to_destination,
-    copy_file_no_date,
-    get_all_media_files,
+    copy_files_batch,
+    iter_media_entries,
     validate_paths,
     restructure_for_smart_mode # НОВАЯ ФУНКЦИЯ ДЛЯ УМНОЙ СОРТИРОВКИ
 )
@@ -177,30 +184,128 @@ def get_user_input() -> tuple:
     return source_path, destination_path, operation_mode, process_no_date, grouping_mode
 
 
-def determine_file_date(file_path: str, filename: str) -> Optional[datetime]:
+def _metadata_date(file_path: str, filename: str,
+                   video_dates: Optional[Dict[str, datetime]],
+                   metadata_cache: Optional[MetadataCache]) -> Optional[datetime]:
+    """Дата из метаданных: пакетно прочитанные видео, кеш, затем чтение файла."""
+    # Расширение вычисляется один раз и передаётся дальше
+    ext = _ext(filename)
+    if video_dates is not None and ext in VIDEO_EXTENSIONS:
+        # Видео уже прочитаны пакетом - повторный запуск exiftool не нужен
+        return video_dates.get(file_path)
+    
+    if metadata_cache is None:
+        return extract_date_from_metadata(file_path, ext)
+    
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return extract_date_from_metadata(file_path, ext)
+    
+    hit, date = metadata_cache.get(file_path, st)
+    if not hit:
+        date = extract_date_from_metadata(file_path, ext)
+        # Без Pillow дата не читается вовсе - такой результат не запоминаем
+        if date or PIL_AVAILABLE:
+            metadata_cache.put(file_path, st, date)
+    return date
+
+
+def _read_video_dates(entries: List[Tuple[str, str, str]], metadata_cache: MetadataCache,
+                      exiftool: ExifToolDaemon) -> Dict[str, datetime]:
     """
-    Определяет дату файла по приоритету:
-    1. Из имени файла
-    2. Из EXIF/метаданных
+    Читает даты видео из пачки файлов одной командой exiftool вместо запуска на каждый файл.
+    Видео с датой в имени пропускаются - для них метаданные не понадобятся,
+    видео из кеша берутся из кеша.
     
     Args:
-        file_path: Полный путь к файлу
-        filename: Имя файла
+        entries: Кортежи (путь, имя_файла, тип) из iter_media_entries
+        metadata_cache: Кеш дат из метаданных с прошлых запусков
+        exiftool: Общий ExifToolDaemon первой фазы
         
     Returns:
-        Объект datetime или None
+        Словарь {путь: datetime} для видео, у которых найдена дата
     """
-    # Приоритет 1: Дата из имени файла
-    date = extract_date_from_filename(filename)
-    if date:
-        return date
+    video_dates = {}
+    video_stats = {}
+    for file_path, filename, kind in entries:
+        if kind != 'video' or extract_date_from_filename(filename):
+            continue
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            continue
+        hit, date = metadata_cache.get(file_path, st)
+        if not hit:
+            video_stats[file_path] = st
+        elif date:
+            video_dates[file_path] = date
     
-    # Приоритет 2: Дата из метаданных (EXIF для фото, metadata для видео)
-    date = extract_date_from_metadata(file_path)
-    if date:
-        return date
+    batch_dates = extract_dates_from_videos_batch(list(video_stats), exiftool)
+    # Без exiftool отсутствие даты не запоминаем - после его установки видео перечитаются
+    remember_missing = get_exiftool_path() is not None
+    for file_path, st in video_stats.items():
+        date = batch_dates.get(file_path)
+        if date or remember_missing:
+            metadata_cache.put(file_path, st, date)
+        if date:
+            video_dates[file_path] = date
+    return video_dates
+
+
+# Число потоков определения дат (чтение EXIF/метаданных) в первой фазе
+DATE_WORKERS = 8
+
+# Вторая фаза получает файлы пачками по PLAN_BATCH_SIZE, пока первая продолжает
+# обход и чтение дат; в очереди ждёт не больше PLAN_QUEUE_BATCHES пачек.
+# Даты видео пачки читаются одной командой exiftool (как VIDEO_BATCH_SIZE)
+PLAN_BATCH_SIZE = 512
+PLAN_QUEUE_BATCHES = 2
+
+
+# Готовые цветные фрагменты вывода для цикла первого прохода
+_BLUE = Fore.BLUE
+_RED = Fore.RED
+_RESET = Style.RESET_ALL
+_ARROW = f"{Fore.YELLOW}→{_RESET}"
+_MARK_NO_DATE = f"{Fore.YELLOW}[Дата неизвестна]{_RESET}"
+_MARK_SKIP = f"{Fore.MAGENTA}[Пропущен]{_RESET}"
+
+# Ограничения частоты обновления консоли в первом проходе
+PROGRESS_DESC_INTERVAL = 0.1   # секунд между сменой описания прогресс-бара
+OUTPUT_FLUSH_INTERVAL = 0.25   # секунд между выводами накопленных строк
+PROGRESS_UPDATE_STEP = 16      # файлов на одно обновление счётчика
+
+
+def _short_path(path: str) -> str:
+    """Сокращает путь для вывода в консоль до 60 символов (конец пути важнее начала)."""
+    return path if len(path) <= 60 else "..." + path[-57:]
+
+
+def _detect_date(entry: Tuple[str, str, str], video_dates: Dict[str, datetime],
+                 metadata_cache: MetadataCache) -> tuple:
+    """
+    Определяет дату одного файла по приоритету: имя файла, затем EXIF/метаданные.
+    Выполняется в пуле потоков первой фазы.
     
-    return None
+    Args:
+        entry: Кортеж (путь, имя_файла, тип) из iter_media_entries
+        video_dates: Даты видео, заранее прочитанные пакетом через exiftool
+        metadata_cache: Кеш дат из метаданных с прошлых запусков
+        
+    Returns:
+        Кортеж (имя_файла, дата_или_None, дата_из_имени, ошибка_или_None)
+    """
+    file_path, filename, _ = entry
+    try:
+        # Приоритет 1: Дата из имени файла - файл при этом вообще не открывается
+        file_date = extract_date_from_filename(filename)
+        if file_date is not None:
+            return filename, file_date, True, None
+        # Приоритет 2: Дата из метаданных (EXIF для фото, metadata для видео)
+        return filename, _metadata_date(file_path, filename, video_dates, metadata_cache), False, None
+    except Exception as e:
+        return filename, None, False, f"Ошибка чтения даты {file_path}: {e}"
 
 
 def process_files(source_path: str, destination_path: str, 
@@ -221,137 +326,268 @@ def process_files(source_path: str, destination_path: str,
     Returns:
         Путь к файлу лога
     """
-    # Получаем список всех медиа файлов
-    all_extensions = PHOTO_EXTENSIONS | VIDEO_EXTENSIONS
-    
     # Проверяем, совпадают ли пути источника и назначения
     # Если совпадают, включаем "умный пропуск" уже организованных папок
     skip_organized = os.path.abspath(source_path) == os.path.abspath(destination_path)
     
-    media_files = get_all_media_files(source_path, all_extensions, skip_organized=skip_organized)
+    # Медиа файлы перебираются по мере обхода дерева: определение дат и копирование
+    # начинаются, не дожидаясь конца сканирования. Имя и тип (фото/видео) каждого
+    # файла определяются один раз при обходе
+    media_entries = iter_media_entries(source_path, skip_organized=skip_organized)
+    first_entry = next(media_entries, None)
     
-    if not media_files:
+    if first_entry is None:
         logger.warning("Не найдено медиа файлов для обработки")
         print("\n⚠️  Не найдено медиа файлов в указанной папке")
         return
     
-    stats.total_files = len(media_files)
-    
-    is_move = operation_mode == 'move'
-    mode_text = "Перемещение" if is_move else "Копирование"
-    mode_color = Fore.RED if is_move else Fore.GREEN
-    
-    # Определяем режим группировки для первого прохода (копирование/перемещение)
-    initial_grouping = grouping_mode
-    grouping_text = ""
-    
-    if grouping_mode == 'smart':
-        # Для умной сортировки сначала все кладем в папки по дням
-        initial_grouping = 'day'
-        grouping_text = "Умная сортировка (Начальная: Год/Месяц/День)"
-    elif grouping_mode == 'day':
-        grouping_text = "Год/Месяц/День"
-    else: # 'month'
-        grouping_text = "Год/Месяц"
-    
-    print(f"\n✓ Найдено файлов: {stats.total_files}")
-    print(f"Источник: {source_path}")
-    print(f"Назначение: {destination_path}")
-    print(f"Режим: {mode_color}{mode_text}{Style.RESET_ALL}")
-    print(f"Группировка: {Fore.CYAN}{grouping_text}{Style.RESET_ALL}")
-    print(f"Файлы без даты: {'Сохранять' if process_no_date else 'Пропускать'}\n")
-    
-    logger.info(f"Начало обработки {stats.total_files} файлов")
-    logger.info(f"Источник: {source_path}")
-    logger.info(f"Назначение: {destination_path}")
-    logger.info(f"Режим: {mode_text}")
-    logger.info(f"Группировка: {grouping_text}")
-    logger.info(f"Файлы без даты: {'Сохранять' if process_no_date else 'Пропускать'}")
-    
-    # Засекаем время начала
-    start_time = time.time()
-    
-    # Обрабатываем файлы с прогресс-баром (ПЕРВЫЙ ПРОХОД)
-    operation_text = "Перемещение" if is_move else "Копирование"
-    print(f"{operation_text} файлов:\n")
-    
-    # Создаём цветной прогресс-бар
-    bar_format = (
-        f'{Fore.CYAN}{{desc}}{Style.RESET_ALL}: '
-        f'{Fore.GREEN}{{percentage:3.0f}}%{Style.RESET_ALL} '
-        f'|{{bar}}| '
-        f'{Fore.YELLOW}{{n_fmt}}/{{total_fmt}}{Style.RESET_ALL} '
-        f'[{Fore.MAGENTA}{{elapsed}}<{{remaining}}{Style.RESET_ALL}, {{rate_fmt}}]'
-    )
+    media_entries = chain((first_entry,), media_entries)
+    # Число найденных файлов растёт по ходу обхода
+    stats.total_files = 0
+    
+    # Даты из метаданных, прочитанные при прошлых запусках
+    metadata_cache = MetadataCache()
+    try:
+        is_move = operation_mode == 'move'
+        mode_text = "Перемещение" if is_move else "Копирование"
+        mode_color = Fore.RED if is_move else Fore.GREEN
+    
+        # Определяем режим группировки для первого прохода (копирование/перемещение)
+        initial_grouping = grouping_mode
+        grouping_text = ""
+    
+        if grouping_mode == 'smart':
+            # Для умной сортировки сначала все кладем в папки по дням
+            initial_grouping = 'day'
+            grouping_text = "Умная сортировка (Начальная: Год/Месяц/День)"
+        elif grouping_mode == 'day':
+            grouping_text = "Год/Месяц/День"
+        else: # 'month'
+            grouping_text = "Год/Месяц"
+    
+        print(f"\nИсточник: {source_path}")
+        print(f"Назначение: {destination_path}")
+        print(f"Режим: {mode_color}{mode_text}{Style.RESET_ALL}")
+        print(f"Группировка: {Fore.CYAN}{grouping_text}{Style.RESET_ALL}")
+        print(f"Файлы без даты: {'Сохранять' if process_no_date else 'Пропускать'}\n")
+    
+        logger.info("Начало обработки файлов")
+        logger.info(f"Источник: {source_path}")
+        logger.info(f"Назначение: {destination_path}")
+        logger.info(f"Режим: {mode_text}")
+        logger.info(f"Группировка: {grouping_text}")
+        logger.info(f"Файлы без даты: {'Сохранять' if process_no_date else 'Пропускать'}")
+    
+        # Засекаем время начала
+        start_time = time.time()
+    
+        # Обрабатываем файлы с прогресс-баром (ПЕРВЫЙ ПРОХОД)
+        operation_text = "Перемещение" if is_move else "Копирование"
+        print(f"{operation_text} файлов:\n")
+    
+        # Создаём цветной прогресс-бар
+        bar_format = (
+            f'{Fore.CYAN}{{desc}}{Style.RESET_ALL}: '
+            f'{Fore.GREEN}{{percentage:3.0f}}%{Style.RESET_ALL} '
+            f'|{{bar}}| '
+            f'{Fore.YELLOW}{{n_fmt}}/{{total_fmt}}{Style.RESET_ALL} '
+            f'[{Fore.MAGENTA}{{elapsed}}<{{remaining}}{Style.RESET_ALL}, {{rate_fmt}}]'
+        )
     
-    with tqdm(total=stats.total_files, 
-              unit=' файл',
-              desc="Прогресс",
-              bar_format=bar_format,
-              position=0,
-              leave=True,
-              colour='green') as pbar:
+        # Счётчик файлов, дата которых найдена по имени
+        name_dates = 0
+    
+        # Вывод в консоль копится и печатается одним tqdm.write не чаще OUTPUT_FLUSH_INTERVAL,
+        # описание и счётчик прогресс-бара обновляются реже, чем приходят файлы
+        output_lines = []
+        last_output_ts = 0.0
+        last_desc_ts = 0.0
+        pending_updates = 0
+    
+        def advance(count: int = 1):
+            """Продвигает прогресс-бар пачками по PROGRESS_UPDATE_STEP файлов."""
+            nonlocal pending_updates
+            pending_updates += count
+            if pending_updates >= PROGRESS_UPDATE_STEP:
+                pbar.update(pending_updates)
+                pending_updates = 0
+    
+        def report(idx: int, file_path: str, filename: str, has_date: bool,
+                   success: bool, dest_path: Optional[str], error_msg: Optional[str]):
+            """Учитывает результат файла в статистике, логе и выводе в консоль."""
+            nonlocal last_output_ts, last_desc_ts
         
-        for idx, file_path in enumerate(media_files, 1):
-            filename = os.path.basename(file_path)
-            
-            # Обновляем описание прогресс-бара текущим файлом
-            pbar.set_description(f"Обработка: {filename}")
-
-            # Определяем дату файла
-            file_date = determine_file_date(file_path, filename)
-            
-            if file_date:
-                # Форматируем дату для структуры папок
-                year, month, day = format_date_for_folder(file_date)
-                
-                # Копируем или перемещаем файл, используя initial_grouping
-                success, dest_path, error_msg = copy_file_to_destination(
-                    file_path, destination_path, year, month, day, 
-                    move=is_move, grouping=initial_grouping # Используем initial_grouping
-                )
-                
+            # Обновляем описание прогресс-бара текущим файлом (не чаще PROGRESS_DESC_INTERVAL)
+            now = time.monotonic()
+            if now - last_desc_ts > PROGRESS_DESC_INTERVAL:
+                pbar.set_description(f"Обработка: {filename}")
+                last_desc_ts = now
+        
+            if has_date:
                 if success:
                     stats.increment_success()
-                    logger.info(f"[{idx}/{stats.total_files}] {file_path} -> {dest_path}")
-                    
+                    logger.info("[%d/%d] %s -> %s", idx, stats.total_files, file_path, dest_path)
+                
                 else:
                     stats.increment_failed(error_msg)
-                    logger.error(f"[{idx}/{stats.total_files}] Ошибка: {error_msg}")
+                    logger.error("[%d/%d] Ошибка: %s", idx, stats.total_files, error_msg)
+            elif process_no_date:
+                # Файл без даты скопирован/перемещён в специальную папку
+                if success:
+                    stats.increment_no_date()
+                    logger.info("[%d/%d] Файл без даты: %s -> %s", idx, stats.total_files, file_path, dest_path)
+                
+                    # Выводим информацию о файле без даты с цветом
+                    output_lines.append(
+                        f"{_BLUE}{idx}/{stats.total_files}{_RESET} "
+                        f"{_short_path(file_path)} {_ARROW} {_MARK_NO_DATE}"
+                    )
+                else:
+                    stats.increment_failed(error_msg)
+                    logger.error("[%d/%d] Ошибка: %s", idx, stats.total_files, error_msg)
+                    # Ошибки выводятся сразу, вместе с накопленными строками
+                    output_lines.append(f"{_RED}⚠️  Ошибка при обработке {filename}: {error_msg}{_RESET}")
+                    last_output_ts = 0.0
             else:
-                # Файл без даты
-                if process_no_date:
-                    # Копируем/перемещаем в специальную папку
-                    success, dest_path, error_msg = copy_file_no_date(file_path, destination_path, move=is_move)
-                    
-                    if success:
-                        stats.increment_no_date()
-                        logger.info(f"[{idx}/{stats.total_files}] Файл без даты: {file_path} -> {dest_path}")
+                # Пропускаем файл без даты
+                stats.increment_skipped()
+                logger.info("[%d/%d] Пропущен файл без даты: %s", idx, stats.total_files, file_path)
+                output_lines.append(
+                    f"{_BLUE}{idx}/{stats.total_files}{_RESET} "
+                    f"{_short_path(file_path)} {_MARK_SKIP}"
+                )
+        
+            if output_lines and now - last_output_ts > OUTPUT_FLUSH_INTERVAL:
+                tqdm.write('\n'.join(output_lines))
+                output_lines.clear()
+                last_output_ts = now
+        
+            advance()
+    
+        # Общее число файлов известно только после обхода - до этого у бара нет total
+        with tqdm(total=None, 
+                  unit=' файл',
+                  desc="Прогресс",
+                  bar_format=bar_format,
+                  position=0,
+                  leave=True,
+                  colour='green') as pbar:
+        
+            # Фаза 1 (отдельный поток): даты определяются в пуле потоков и передаются
+            # второй фазе пачками через ограниченную очередь, поэтому чтение
+            # метаданных одних файлов идёт одновременно с копированием других
+            pbar.set_description("Определение дат")
+            plan_q = queue.Queue(maxsize=PLAN_QUEUE_BATCHES)
+            plan_errors = []
+            # Выставляется, если вторая фаза прервана (ошибка, Ctrl+C): первая фаза
+            # перестаёт отдавать пачки и отменяет ещё не начатые задания
+            stop_planning = threading.Event()
+        
+            def hand_over(item):
+                """Кладёт пачку в plan_q, пока вторая фаза её ждёт."""
+                while not stop_planning.is_set():
+                    try:
+                        plan_q.put(item, timeout=0.1)
+                        return
+                    except queue.Full:
+                        continue
+        
+            def plan_dates():
+                """
+                Обходит дерево и определяет даты файлов пачками по PLAN_BATCH_SIZE.
+                Следующая пачка читается (обход, даты видео одной командой exiftool,
+                отправка в пул), пока пул обрабатывает текущую; готовые пачки
+                по порядку уходят в plan_q.
+                """
+                exiftool = ExifToolDaemon()
+                try:
+                    with ThreadPoolExecutor(max_workers=DATE_WORKERS) as executor:
+                        def start_batch():
+                            """Берёт следующие файлы обхода и отправляет их в пул."""
+                            entries = list(islice(media_entries, PLAN_BATCH_SIZE))
+                            first_idx = stats.total_files + 1
+                            stats.total_files += len(entries)
+                            video_dates = _read_video_dates(entries, metadata_cache, exiftool)
+                            return [
+                                (idx, entry[0], executor.submit(_detect_date, entry, video_dates, metadata_cache))
+                                for idx, entry in enumerate(entries, first_idx)
+                            ]
                         
-                        # Выводим информацию о файле без даты с цветом
-                        short_source = file_path if len(file_path) <= 60 else "..." + file_path[-57:]
-                        tqdm.write(
-                            f"{Fore.BLUE}{idx}/{stats.total_files}{Style.RESET_ALL} "
-                            f"{short_source} {Fore.YELLOW}→{Style.RESET_ALL} "
-                            f"{Fore.YELLOW}[Дата неизвестна]{Style.RESET_ALL}"
-                        )
-                    else:
-                        stats.increment_failed(error_msg)
-                        logger.error(f"[{idx}/{stats.total_files}] Ошибка: {error_msg}")
-                        tqdm.write(f"{Fore.RED}⚠️  Ошибка при обработке {filename}: {error_msg}{Style.RESET_ALL}")
-                else:
-                    # Пропускаем файл без даты
-                    stats.increment_skipped()
-                    logger.info(f"[{idx}/{stats.total_files}] Пропущен файл без даты: {file_path}")
-                    short_source = file_path if len(file_path) <= 60 else "..." + file_path[-57:]
-                    tqdm.write(
-                        f"{Fore.BLUE}{idx}/{stats.total_files}{Style.RESET_ALL} "
-                        f"{short_source} {Fore.MAGENTA}[Пропущен]{Style.RESET_ALL}"
-                    )
-            
-            # Обновляем прогресс-бар
-            pbar.update(1)
-            
+                        in_flight = start_batch()
+                        while in_flight and not stop_planning.is_set():
+                            upcoming = start_batch()
+                            batch = []
+                            for idx, file_path, future in in_flight:
+                                if stop_planning.is_set():
+                                    future.cancel()
+                                    continue
+                                batch.append((idx, (file_path,) + future.result()))
+                            hand_over(batch)
+                            in_flight = upcoming
+                        for _, _, future in in_flight:
+                            future.cancel()
+                except Exception as e:
+                    plan_errors.append(e)
+                finally:
+                    exiftool.close()
+                    hand_over(None)
+        
+            planner = threading.Thread(target=plan_dates, daemon=True)
+            planner.start()
+        
+            try:
+                # Фаза 2: план копирования. Задания каждой пачки сортируются по папке
+                # назначения (дата определяет папку), чтобы запись в каждую папку шла
+                # подряд, а папки создавались один раз (copy_files_batch)
+                for plan in iter(plan_q.get, None):
+                    # Бар показывает долю от файлов, найденных к этому моменту
+                    pbar.total = stats.total_files
+                    pbar.refresh()
+                    jobs = []
+                    for idx, (file_path, filename, file_date, from_name, error_msg) in plan:
+                        if from_name:
+                            name_dates += 1
+                        if error_msg:
+                            report(idx, file_path, filename, True, False, None, error_msg)
+                        elif file_date:
+                            year, month, day = format_date_for_folder(file_date)
+                            jobs.append((idx, filename, (file_path, destination_path, year, month, day)))
+                        elif process_no_date:
+                            jobs.append((idx, filename, (file_path, destination_path, None, None, None)))
+                        else:
+                            report(idx, file_path, filename, False, False, None, None)
+                
+                    # Файлы без даты (год None) - в конце пачки
+                    jobs.sort(key=lambda job: (job[2][2] is None, job[2][2:]))
+                
+                    # Результаты обрабатываются в главном потоке по мере готовности,
+                    # поэтому статистика, лог и прогресс-бар не требуют блокировок
+                    for job_idx, (success, dest_path, error_msg) in copy_files_batch(
+                        [job for _, _, job in jobs], move=is_move, grouping=initial_grouping
+                    ):
+                        idx, filename, job = jobs[job_idx]
+                        report(idx, job[0], filename, job[2] is not None, success, dest_path, error_msg)
+            finally:
+                # Первая фаза пользуется кешем метаданных - она завершается до его закрытия
+                stop_planning.set()
+                planner.join()
+            if plan_errors:
+                raise plan_errors[0]
+        
+            pbar.total = stats.total_files
+            if output_lines:
+                tqdm.write('\n'.join(output_lines))
+            pbar.update(pending_updates)
+    finally:
+        # Накопленные записи кеша сохраняются и при ошибке или прерывании (Ctrl+C)
+        metadata_cache.close()
+    
+    # Доля файлов, дата которых найдена по имени (без чтения метаданных)
+    logger.info(
+        f"Дата из имени файла: {name_dates} из {stats.total_files} "
+        f"({name_dates * 100 // stats.total_files}%)"
+    )
+    
     # --- ВТОРОЙ ПРОХОД: УМНАЯ СОРТИРОВКА ---
     if grouping_mode == 'smart' and (stats.successful > 0 or stats.no_date > 0):
         logger.info("-" * 60)
@@ -485,9 +721,12 @@ def main():
         
     except KeyboardInterrupt:
         print("\n\n⚠️  Операция прервана пользователем")
+        # Дописываем в файл записи, оставшиеся в очереди лога
+        stop_logger()
         sys.exit(1)
     except Exception as e:
         print(f"\n❌ Критическая ошибка: {e}")
+        stop_logger()
         sys.exit(1)
 
 
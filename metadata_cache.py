@@ -0,0 +1,128 @@
+"""
+Модуль постоянного кеша дат из метаданных.
+Хранит дату, извлечённую из EXIF/метаданных видео, между запусками,
+чтобы при повторной сортировке той же папки не читать файлы заново.
+"""
+
+import os
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+
+logger = logging.getLogger("media_organizer")
+
+
+# Файл базы кеша
+METADATA_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "photos_by_date", "meta.db")
+
+# Количество новых записей, после которого они сбрасываются в базу одним executemany
+CACHE_FLUSH_SIZE = 1000
+
+
+class MetadataCache:
+    """
+    Кеш дат из метаданных на SQLite.
+
+    Запись актуальна, пока у файла не изменились размер и mtime_ns.
+    Кешируется и отсутствие даты (None), чтобы не перечитывать файлы без неё.
+    Методы можно вызывать из нескольких потоков.
+
+    Используется как контекстный менеджер:
+        with MetadataCache() as cache:
+            hit, date = cache.get(file_path, st)
+    """
+
+    def __init__(self, db_path: str = METADATA_CACHE_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._pending: List[Tuple[str, int, int, Optional[str]]] = []
+        self._conn = None
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS dates ("
+                "path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, iso_date TEXT NULL)"
+            )
+            self._conn.commit()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("Кеш метаданных недоступен (%s): %s", db_path, e)
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get(self, file_path: str, st: os.stat_result) -> Tuple[bool, Optional[datetime]]:
+        """
+        Ищет дату файла в кеше.
+
+        Args:
+            file_path: Путь к файлу
+            st: Результат os.stat для файла
+
+        Returns:
+            Кортеж (найдено_в_кеше, дата_или_None)
+        """
+        if self._conn is None:
+            return False, None
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT size, mtime, iso_date FROM dates WHERE path = ?",
+                    (os.path.abspath(file_path),)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.debug("Ошибка чтения кеша метаданных: %s", e)
+            return False, None
+
+        if row is None or row[0] != st.st_size or row[1] != st.st_mtime_ns:
+            return False, None
+        return True, datetime.fromisoformat(row[2]) if row[2] else None
+
+    def put(self, file_path: str, st: os.stat_result, date: Optional[datetime]):
+        """Запоминает дату файла (или её отсутствие)."""
+        if self._conn is None:
+            return
+        row = (
+            os.path.abspath(file_path), st.st_size, st.st_mtime_ns,
+            date.isoformat() if date else None
+        )
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= CACHE_FLUSH_SIZE:
+                self._flush_locked()
+
+    def flush(self):
+        """Записывает накопленные записи в базу."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        """Записывает накопленные записи; вызывается под self._lock."""
+        if not self._pending or self._conn is None:
+            return
+        try:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO dates (path, size, mtime, iso_date) VALUES (?, ?, ?, ?)",
+                self._pending
+            )
+            self._conn.commit()
+        except sqlite3.Error as e:
+            logger.warning("Не удалось сохранить кеш метаданных %s: %s", self.db_path, e)
+        self._pending = []
+
+    def close(self):
+        """Сбрасывает накопленные записи и закрывает базу."""
+        if self._conn is None:
+            return
+        self.flush()
+        self._conn.close()
+        self._conn = None
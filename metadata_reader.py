@@ -5,10 +5,16 @@
 """
 
 import os
+import atexit
+import struct
 import subprocess
 import json
+import queue
+import threading
+import time
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Optional
+from typing import Callable, Dict, List, Optional, Tuple
 import logging
 
 try:
@@ -42,6 +48,18 @@ VIDEO_EXTENSIONS = {
 }
 
 
+def _ext(filename: str) -> str:
+    """
+    Возвращает расширение файла в нижнем регистре (с точкой) или ''.
+    
+    Аналог os.path.splitext(filename)[1].lower() для имени без каталога:
+    rfind + срез без промежуточного кортежа. Точка в начале имени
+    (скрытые файлы, например '.jpg') расширением не считается.
+    """
+    dot = filename.rfind('.')
+    return filename[dot:].lower() if dot > 0 else ''
+
+
 def is_media_file(filename: str) -> bool:
     """
     Проверяет, является ли файл медиа файлом.
@@ -52,20 +70,18 @@ def is_media_file(filename: str) -> bool:
     Returns:
         True, если файл - фото или видео
     """
-    ext = os.path.splitext(filename)[1].lower()
+    ext = _ext(filename)
     return ext in PHOTO_EXTENSIONS or ext in VIDEO_EXTENSIONS
 
 
 def is_photo(filename: str) -> bool:
     """Проверяет, является ли файл фотографией."""
-    ext = os.path.splitext(filename)[1].lower()
-    return ext in PHOTO_EXTENSIONS
+    return _ext(filename) in PHOTO_EXTENSIONS
 
 
 def is_video(filename: str) -> bool:
     """Проверяет, является ли файл видео."""
-    ext = os.path.splitext(filename)[1].lower()
-    return ext in VIDEO_EXTENSIONS
+    return _ext(filename) in VIDEO_EXTENSIONS
 
 
 def find_exiftool() -> Optional[str]:
@@ -91,7 +107,7 @@ def find_exiftool() -> Optional[str]:
                 timeout=2
             )
             if result.returncode == 0:
-                logger.debug(f"Найден exiftool: {path} (версия {result.stdout.strip()})")
+                logger.debug("Найден exiftool: %s (версия %s)", path, result.stdout.strip())
                 return path
         except (subprocess.SubprocessError, FileNotFoundError):
             continue
@@ -100,18 +116,222 @@ def find_exiftool() -> Optional[str]:
     return None
 
 
-# Кешируем путь к exiftool
+# Кешируем путь к exiftool.
+# Отдельный флаг нужен, чтобы не повторять поиск, если exiftool не найден (None).
 _EXIFTOOL_PATH = None
+_EXIFTOOL_SEARCHED = False
 
 
 def get_exiftool_path() -> Optional[str]:
     """Возвращает закешированный путь к exiftool."""
-    global _EXIFTOOL_PATH
-    if _EXIFTOOL_PATH is None:
+    global _EXIFTOOL_PATH, _EXIFTOOL_SEARCHED
+    if not _EXIFTOOL_SEARCHED:
         _EXIFTOOL_PATH = find_exiftool()
+        _EXIFTOOL_SEARCHED = True
     return _EXIFTOOL_PATH
 
 
+class ExifToolDaemon:
+    """
+    Долгоживущий процесс exiftool в режиме -stay_open.
+
+    Запуск exiftool (интерпретатор Perl + таблицы тегов) занимает сотни миллисекунд,
+    поэтому процесс запускается один раз, а команды передаются через stdin.
+    Используется как контекстный менеджер:
+
+        with ExifToolDaemon() as et:
+            et.write_tags(file_path, {'CreateDate': '2025:08:23 19:27:14'})
+    """
+
+    READY_MARKER = '{ready}'
+
+    # Сколько секунд ждать ответа exiftool на одну команду
+    DEFAULT_TIMEOUT = 60
+
+    def __init__(self, exiftool_path: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT):
+        self.exiftool_path = exiftool_path or get_exiftool_path()
+        self.timeout = timeout
+        self.process = None
+        self._stdout_lines = None
+        self._stderr_lines = None
+
+    def start(self):
+        """Запускает процесс exiftool, если он ещё не запущен."""
+        if self.process is not None or not self.exiftool_path:
+            return
+        self.process = subprocess.Popen(
+            [self.exiftool_path, '-stay_open', 'True', '-@', '-'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8'
+        )
+        # stdout и stderr читаются фоновыми потоками одновременно: если читать их
+        # по очереди, заполненный буфер stderr блокирует exiftool, пока ждём stdout
+        self._stdout_lines = queue.Queue()
+        self._stderr_lines = queue.Queue()
+        for stream, lines in ((self.process.stdout, self._stdout_lines),
+                              (self.process.stderr, self._stderr_lines)):
+            threading.Thread(target=self._pump, args=(stream, lines), daemon=True).start()
+        logger.debug("Запущен exiftool -stay_open: %s", self.exiftool_path)
+
+    @staticmethod
+    def _pump(stream, lines: queue.Queue):
+        """Переносит строки из канала процесса в очередь; None - конец потока."""
+        for line in iter(stream.readline, ''):
+            lines.put(line)
+        lines.put(None)
+
+    def close(self):
+        """Завершает процесс exiftool."""
+        if self.process is None:
+            return
+        try:
+            self.process.stdin.write('-stay_open\nFalse\n')
+            self.process.stdin.flush()
+            self.process.wait(timeout=10)
+        except Exception as e:
+            logger.debug("Ошибка при завершении exiftool: %s", e)
+            self.process.kill()
+        self.process = None
+
+    def kill(self):
+        """Принудительно завершает процесс; следующая команда запустит новый."""
+        if self.process is None:
+            return
+        self.process.kill()
+        self.process.wait()
+        self.process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _read_until_ready(self, lines: queue.Queue, deadline: float) -> str:
+        """
+        Читает строки потока до маркера готовности exiftool.
+
+        Если маркер не пришёл до deadline, зависший процесс убивается
+        (следующая команда запустит новый) и выбрасывается TimeoutError.
+        """
+        output = []
+        while True:
+            try:
+                line = lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                self.kill()
+                raise TimeoutError("exiftool не ответил вовремя и был перезапущен")
+            if line is None:
+                self.kill()
+                raise RuntimeError("exiftool неожиданно завершился")
+            if line.rstrip('\r\n') == self.READY_MARKER:
+                return ''.join(output)
+            output.append(line)
+
+    def execute(self, *args: str, timeout: Optional[float] = None) -> Tuple[str, str]:
+        """
+        Выполняет одну команду exiftool.
+
+        Args:
+            args: Аргументы командной строки exiftool (по одному на строку)
+            timeout: Время ожидания ответа в секундах (по умолчанию self.timeout)
+
+        Returns:
+            Кортеж (stdout, stderr)
+        """
+        return self.execute_batch([list(args)], timeout)[0]
+
+    def execute_batch(self, commands: List[List[str]],
+                      timeout: Optional[float] = None) -> List[Tuple[str, str]]:
+        """
+        Отправляет несколько команд exiftool за одну запись в stdin
+        и затем читает ответы по порядку.
+
+        Args:
+            commands: Список команд, каждая - список аргументов
+            timeout: Время ожидания ответа на каждую команду в секундах
+                (по умолчанию self.timeout)
+
+        Returns:
+            Список кортежей (stdout, stderr) в порядке команд
+
+        Raises:
+            TimeoutError: exiftool не ответил вовремя (процесс перезапускается)
+        """
+        if timeout is None:
+            timeout = self.timeout
+        self.start()
+        if self.process is None:
+            raise RuntimeError("exiftool не найден")
+
+        # -echo4 выводит маркер в stderr после выполнения команды,
+        # -execute выводит маркер в stdout
+        payload = ''.join(
+            '\n'.join(args) + f'\n-echo4\n{self.READY_MARKER}\n-execute\n'
+            for args in commands
+        )
+        self.process.stdin.write(payload)
+        self.process.stdin.flush()
+
+        results = []
+        for _ in commands:
+            deadline = time.monotonic() + timeout
+            stdout = self._read_until_ready(self._stdout_lines, deadline)
+            stderr = self._read_until_ready(self._stderr_lines, deadline)
+            results.append((stdout, stderr))
+        return results
+
+    @staticmethod
+    def _write_args(file_path: str, tags: Dict[str, str]) -> List[str]:
+        """Формирует аргументы exiftool для записи тегов в файл."""
+        args = [f'-{tag}={value}' for tag, value in tags.items()]
+        args += ['-overwrite_original', file_path]
+        return args
+
+    @staticmethod
+    def _write_result(stderr: str) -> Tuple[bool, str]:
+        """Определяет результат записи по выводу ошибок exiftool."""
+        errors = [line for line in stderr.splitlines() if line.startswith('Error')]
+        if errors:
+            return False, '\n'.join(errors)
+        return True, ""
+
+    def write_tags(self, file_path: str, tags: Dict[str, str]) -> Tuple[bool, str]:
+        """
+        Записывает теги в файл.
+
+        Args:
+            file_path: Путь к файлу
+            tags: Словарь {имя_тега: значение}
+
+        Returns:
+            Кортеж (успех, текст ошибки exiftool)
+        """
+        _, stderr = self.execute(*self._write_args(file_path, tags))
+        return self._write_result(stderr)
+
+    def write_tags_batch(self, items: List[Tuple[str, Dict[str, str]]]) -> List[Tuple[bool, str]]:
+        """
+        Записывает теги в несколько файлов за одну отправку команд.
+
+        Args:
+            items: Список (путь_к_файлу, словарь_тегов)
+
+        Returns:
+            Список (успех, текст ошибки exiftool) в порядке items
+        """
+        commands = [self._write_args(file_path, tags) for file_path, tags in items]
+        return [self._write_result(stderr) for _, stderr in self.execute_batch(commands)]
+
+
+# Тег IFD0, указывающий на вложенный Exif IFD (DateTimeOriginal, DateTimeDigitized)
+EXIF_IFD_POINTER = 0x8769
+
+
 def extract_date_from_exif(file_path: str) -> Optional[datetime]:
     """
     Извлекает дату создания из EXIF фотографии.
@@ -126,40 +346,259 @@ def extract_date_from_exif(file_path: str) -> Optional[datetime]:
         logger.warning("Pillow не установлен. EXIF данные недоступны.")
         return None
     
-    if not os.path.exists(file_path):
-        logger.error(f"Файл не найден: {file_path}")
+    try:
+        # Контекстный менеджер сразу закрывает файл (на Windows открытый
+        # файл мешает последующему перемещению)
+        with Image.open(file_path) as image:
+            exif = image.getexif()
+            
+            if not exif:
+                logger.debug("EXIF данные отсутствуют в файле: %s", file_path)
+                return None
+            
+            # DateTime лежит в IFD0, DateTimeOriginal и DateTimeDigitized -
+            # во вложенном Exif IFD, который разбирается только по запросу
+            exif_ifd = exif.get_ifd(EXIF_IFD_POINTER)
+            
+            # Ищем дату создания в EXIF
+            # Приоритет: DateTimeOriginal > DateTime > DateTimeDigitized
+            for tag_id, tags in ((36867, exif_ifd), (306, exif), (36868, exif_ifd)):
+                date_value = tags.get(tag_id)
+                if isinstance(date_value, bytes):
+                    date_value = date_value.decode('ascii', 'replace')
+                if not isinstance(date_value, str):
+                    continue
+                date_obj = _parse_exif_ts(date_value.strip('\x00 '))
+                if date_obj is None:
+                    logger.debug("Ошибка парсинга даты EXIF: %r", date_value)
+                    continue
+                logger.debug("Дата из EXIF (%s): %s", TAGS.get(tag_id, tag_id), date_obj)
+                return date_obj
+        
+        logger.debug("Дата создания не найдена в EXIF: %s", file_path)
+        return None
+        
+    except Exception as e:
+        logger.debug("Ошибка чтения EXIF из %s: %s", file_path, e)
         return None
+
+
+# Сколько байт с начала файла читает быстрый разбор EXIF
+EXIF_HEADER_READ_SIZE = 128 * 1024
+
+# Форматы, у которых EXIF лежит в начале файла: JPEG (сегмент APP1)
+# и RAW на основе TIFF (заголовок TIFF в начале файла)
+FAST_EXIF_EXTENSIONS = frozenset({
+    '.jpg', '.jpeg', '.tif', '.tiff', '.dng', '.cr2', '.nef', '.arw'
+})
+
+
+def _parse_exif_ts(value: str) -> Optional[datetime]:
+    """
+    Разбирает дату EXIF "YYYY:MM:DD HH:MM:SS" срезами по фиксированным позициям.
     
+    Заменяет datetime.strptime, который на каждый вызов разбирает формат
+    и обращается к локали. Часовой пояс и доли секунды после 19-го символа
+    игнорируются.
+    
+    Returns:
+        Объект datetime или None, если строка не является корректной датой
+        (в том числе нулевая дата "0000:00:00 00:00:00")
+    """
     try:
-        image = Image.open(file_path)
-        exif_data = image._getexif()
-        
-        if not exif_data:
-            logger.debug(f"EXIF данные отсутствуют в файле: {file_path}")
+        return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                        int(value[11:13]), int(value[14:16]), int(value[17:19]))
+    except (ValueError, IndexError):
+        return None
+
+
+def _tiff_date_tags(tiff: bytes) -> Dict[int, str]:
+    """
+    Читает теги дат из блока TIFF/EXIF: DateTime из IFD0,
+    DateTimeOriginal и DateTimeDigitized из Exif IFD.
+    
+    Raises:
+        ValueError: если структура повреждена или не помещается в буфер
+    """
+    if tiff[:4] == b'II*\x00':
+        order = '<'
+    elif tiff[:4] == b'MM\x00*':
+        order = '>'
+    else:
+        raise ValueError("нет заголовка TIFF")
+    
+    def read_ifd(offset: int, wanted: Tuple[int, ...]) -> Dict[int, Tuple[int, int, bytes]]:
+        (count,) = struct.unpack_from(order + 'H', tiff, offset)
+        entries = {}
+        for i in range(count):
+            tag, type_id, value_count = struct.unpack_from(order + 'HHI', tiff, offset + 2 + i * 12)
+            if tag in wanted:
+                value_pos = offset + 10 + i * 12
+                entries[tag] = (type_id, value_count, tiff[value_pos:value_pos + 4])
+        return entries
+    
+    def ascii_value(entry: Tuple[int, int, bytes]) -> Optional[str]:
+        type_id, value_count, raw = entry
+        if type_id != 2:  # ASCII
             return None
+        if value_count > 4:
+            (value_offset,) = struct.unpack(order + 'I', raw)
+            raw = tiff[value_offset:value_offset + value_count]
+            if len(raw) < value_count:
+                raise ValueError("значение тега за пределами буфера")
+        return raw[:value_count].decode('ascii', 'replace').strip('\x00 ')
+    
+    dates = {}
+    (ifd0_offset,) = struct.unpack_from(order + 'I', tiff, 4)
+    ifd0 = read_ifd(ifd0_offset, (306, EXIF_IFD_POINTER))
+    if 306 in ifd0:
+        dates[306] = ascii_value(ifd0[306])
+    if EXIF_IFD_POINTER in ifd0:
+        (exif_offset,) = struct.unpack(order + 'I', ifd0[EXIF_IFD_POINTER][2])
+        exif_ifd = read_ifd(exif_offset, (36867, 36868))
+        for tag_id, entry in exif_ifd.items():
+            dates[tag_id] = ascii_value(entry)
+    return dates
+
+
+def _jpeg_exif_block(data: bytes) -> Optional[bytes]:
+    """
+    Находит блок TIFF/EXIF в сегменте APP1 JPEG.
+    
+    Returns:
+        Блок TIFF или None, если EXIF в файле нет
         
-        # Ищем дату создания в EXIF
-        # Приоритет: DateTimeOriginal > DateTime > DateTimeDigitized
-        date_tags = [36867, 306, 36868]  # DateTimeOriginal, DateTime, DateTimeDigitized
+    Raises:
+        ValueError: если сегменты не помещаются в буфер
+    """
+    pos = 2
+    while True:
+        if pos + 4 > len(data):
+            raise ValueError("заголовок JPEG не помещается в буфер")
+        if data[pos] != 0xFF:
+            raise ValueError("повреждённый сегмент JPEG")
+        marker = data[pos + 1]
+        if marker == 0xFF:
+            # Байты-заполнители между сегментами
+            pos += 1
+            continue
+        if marker == 0xDA:  # SOS - дальше сжатые данные изображения
+            return None
+        (length,) = struct.unpack_from('>H', data, pos + 2)
+        if marker == 0xE1 and data[pos + 4:pos + 10] == b'Exif\x00\x00':
+            return data[pos + 10:pos + 2 + length]
+        pos += 2 + length
+
+
+def extract_date_from_exif_fast(file_path: str) -> Optional[datetime]:
+    """
+    Извлекает дату создания из EXIF, читая только начало файла.
+    
+    Для JPEG и RAW на основе TIFF (DNG, CR2, NEF, ARW) теги дат находятся
+    в первых килобайтах файла, поэтому читается EXIF_HEADER_READ_SIZE байт
+    и разбираются только нужные теги - без открытия изображения через Pillow.
+    Если структура не распознана или не помещается в буфер, используется
+    extract_date_from_exif.
+    
+    Args:
+        file_path: Путь к файлу фотографии
         
-        for tag_id in date_tags:
-            if tag_id in exif_data:
-                date_str = exif_data[tag_id]
-                try:
-                    # Формат EXIF даты: "YYYY:MM:DD HH:MM:SS"
-                    date_obj = datetime.strptime(date_str, "%Y:%m:%d %H:%M:%S")
-                    logger.debug(f"Дата из EXIF ({TAGS.get(tag_id, tag_id)}): {date_obj}")
-                    return date_obj
-                except ValueError as e:
-                    logger.debug(f"Ошибка парсинга даты EXIF: {e}")
-                    continue
+    Returns:
+        Объект datetime или None
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            data = f.read(EXIF_HEADER_READ_SIZE)
         
-        logger.debug(f"Дата создания не найдена в EXIF: {file_path}")
-        return None
+        if data[:2] == b'\xff\xd8':
+            tiff = _jpeg_exif_block(data)
+            if tiff is None:
+                logger.debug("EXIF данные отсутствуют в файле: %s", file_path)
+                return None
+        else:
+            tiff = data
+        dates = _tiff_date_tags(tiff)
+    except (OSError, ValueError, struct.error) as e:
+        logger.debug("Быстрое чтение EXIF не удалось для %s: %s", file_path, e)
+        return extract_date_from_exif(file_path)
+    
+    # Приоритет: DateTimeOriginal > DateTime > DateTimeDigitized
+    for tag_id in (36867, 306, 36868):
+        date_value = dates.get(tag_id)
+        if not date_value:
+            continue
+        date_obj = _parse_exif_ts(date_value)
+        if date_obj is None:
+            logger.debug("Ошибка парсинга даты EXIF: %r", date_value)
+            continue
+        logger.debug("Дата из EXIF (%d): %s", tag_id, date_obj)
+        return date_obj
+    
+    logger.debug("Дата создания не найдена в EXIF: %s", file_path)
+    return None
+
+
+# Список тегов для поиска даты в видео (в порядке приоритета)
+# Используем теги, которые мы изменяем в быстром действии
+VIDEO_DATE_TAGS = (
+    'QuickTime:CreateDate',
+    'QuickTime:MediaCreateDate',
+    'QuickTime:TrackCreateDate',
+    'Keys:CreationDate',
+    'QuickTime:CreationDate',
+)
+
+# Количество видео в одной команде exiftool при пакетном чтении дат
+VIDEO_BATCH_SIZE = 512
+
+# Сколько секунд ждать exiftool при чтении даты одного видео
+VIDEO_EXIFTOOL_TIMEOUT = 10
+
+
+def _date_from_video_metadata(metadata: dict) -> Optional[datetime]:
+    """
+    Выбирает дату создания из JSON-ответа exiftool для одного видео.
+    
+    Args:
+        metadata: Словарь тегов (-time:all -G1 -j -n)
         
-    except Exception as e:
-        logger.debug(f"Ошибка чтения EXIF из {file_path}: {e}")
-        return None
+    Returns:
+        Объект datetime или None
+    """
+    for tag in VIDEO_DATE_TAGS:
+        if tag in metadata:
+            date_value = metadata[tag]
+            
+            # Пробуем распарсить дату
+            if isinstance(date_value, str):
+                # Формат: "YYYY:MM:DD HH:MM:SS" (и ISO "YYYY-MM-DDTHH:MM:SS" - те же позиции)
+                date_obj = _parse_exif_ts(date_value)
+                if date_obj is None:
+                    try:
+                        # Прочие варианты ISO, например без секунд
+                        date_obj = datetime.fromisoformat(date_value.split('.')[0])
+                    except ValueError:
+                        logger.debug("Не удалось распарсить дату из %s: %s", tag, date_value)
+                        continue
+                logger.debug("Дата из видео (%s): %s", tag, date_obj)
+                return date_obj
+    return None
+
+
+# Общий процесс exiftool -stay_open для чтения дат отдельных видео.
+# Запускается при первом обращении и завершается при выходе из программы;
+# блокировка нужна, т.к. файлы обрабатываются в пуле потоков.
+_video_daemon = None
+_video_daemon_lock = threading.Lock()
+
+
+def _get_video_daemon() -> ExifToolDaemon:
+    """Возвращает общий процесс exiftool (вызывается под _video_daemon_lock)."""
+    global _video_daemon
+    if _video_daemon is None:
+        _video_daemon = ExifToolDaemon()
+        atexit.register(_video_daemon.close)
+    return _video_daemon
 
 
 def extract_date_from_video_exiftool(file_path: str) -> Optional[datetime]:
@@ -176,96 +615,132 @@ def extract_date_from_video_exiftool(file_path: str) -> Optional[datetime]:
     if not exiftool_path:
         return None
     
-    if not os.path.exists(file_path):
-        logger.error(f"Файл не найден: {file_path}")
-        return None
-    
     try:
-        # Запрашиваем все теги времени из видео в формате JSON
-        result = subprocess.run(
-            [exiftool_path, '-time:all', '-G1', '-j', '-n', file_path],
-            capture_output=True,
-            text=True,
-            timeout=10
-        )
+        # Запрашиваем все теги времени из видео в формате JSON через общий процесс exiftool
+        with _video_daemon_lock:
+            daemon = _get_video_daemon()
+            try:
+                stdout, stderr = daemon.execute('-time:all', '-G1', '-j', '-n', file_path,
+                                                timeout=VIDEO_EXIFTOOL_TIMEOUT)
+            except (OSError, RuntimeError):
+                # Процесс завис или завершился - следующий вызов запустит новый
+                daemon.kill()
+                raise
         
-        if result.returncode != 0:
-            logger.debug(f"exiftool вернул ошибку для {file_path}: {result.stderr}")
+        if not stdout.strip():
+            logger.debug("exiftool вернул ошибку для %s: %s", file_path, stderr)
             return None
         
         # Парсим JSON
-        data = json.loads(result.stdout)
+        data = json.loads(stdout)
         if not data or len(data) == 0:
-            logger.debug(f"exiftool не вернул данных для {file_path}")
+            logger.debug("exiftool не вернул данных для %s", file_path)
             return None
         
-        metadata = data[0]
-        
-        # Список тегов для поиска даты (в порядке приоритета)
-        # Используем теги, которые мы изменяем в быстром действии
-        date_tags = [
-            'QuickTime:CreateDate',
-            'QuickTime:MediaCreateDate',
-            'QuickTime:TrackCreateDate',
-            'Keys:CreationDate',
-            'QuickTime:CreationDate',
-        ]
-        
-        for tag in date_tags:
-            if tag in metadata:
-                date_value = metadata[tag]
-                
-                # Пробуем распарсить дату
-                if isinstance(date_value, str):
-                    try:
-                        # Формат: "YYYY:MM:DD HH:MM:SS"
-                        date_obj = datetime.strptime(date_value, "%Y:%m:%d %H:%M:%S")
-                        logger.debug(f"Дата из видео ({tag}): {date_obj}")
-                        return date_obj
-                    except ValueError:
-                        try:
-                            # Формат ISO: "YYYY-MM-DDTHH:MM:SS"
-                            date_obj = datetime.strptime(date_value.replace('T', ' ').split('.')[0], "%Y-%m-%d %H:%M:%S")
-                            logger.debug(f"Дата из видео ({tag}): {date_obj}")
-                            return date_obj
-                        except ValueError:
-                            logger.debug(f"Не удалось распарсить дату из {tag}: {date_value}")
-                            continue
+        date_obj = _date_from_video_metadata(data[0])
+        if date_obj is None:
+            logger.debug("Дата создания не найдена в метаданных видео: %s", file_path)
+        return date_obj
         
-        logger.debug(f"Дата создания не найдена в метаданных видео: {file_path}")
-        return None
-        
-    except subprocess.TimeoutExpired:
-        logger.warning(f"Таймаут при чтении метаданных видео: {file_path}")
-        return None
     except json.JSONDecodeError as e:
-        logger.debug(f"Ошибка парсинга JSON от exiftool: {e}")
+        logger.debug("Ошибка парсинга JSON от exiftool: %s", e)
+        return None
+    except TimeoutError:
+        logger.warning("exiftool не ответил за %d с: %s", VIDEO_EXIFTOOL_TIMEOUT, file_path)
         return None
     except Exception as e:
-        logger.debug(f"Ошибка чтения метаданных видео из {file_path}: {e}")
+        logger.debug("Ошибка чтения метаданных видео из %s: %s", file_path, e)
         return None
 
 
-def extract_date_from_metadata(file_path: str) -> Optional[datetime]:
+def extract_dates_from_videos_batch(paths: List[str],
+                                    exiftool: Optional[ExifToolDaemon] = None) -> Dict[str, datetime]:
+    """
+    Извлекает даты создания сразу для многих видео через один процесс exiftool.
+    
+    Вместо запуска exiftool на каждый файл (сотни миллисекунд на старт Perl)
+    используется ExifToolDaemon: пути передаются пачками по VIDEO_BATCH_SIZE
+    в одной команде, ответ - JSON-массив с полем SourceFile.
+    
+    Args:
+        paths: Пути к видео файлам
+        exiftool: Запущенный ExifToolDaemon для повторных вызовов
+            (если None - процесс запускается на время вызова)
+        
+    Returns:
+        Словарь {путь: datetime} только для файлов, у которых найдена дата
+    """
+    dates: Dict[str, datetime] = {}
+    if not paths or not get_exiftool_path():
+        return dates
+    
+    try:
+        with (ExifToolDaemon() if exiftool is None else nullcontext(exiftool)) as et:
+            for start in range(0, len(paths), VIDEO_BATCH_SIZE):
+                chunk = paths[start:start + VIDEO_BATCH_SIZE]
+                # exiftool возвращает SourceFile с прямыми слешами
+                by_source = {path.replace(os.sep, '/'): path for path in chunk}
+                try:
+                    stdout, _ = et.execute('-time:all', '-G1', '-j', '-n', *chunk)
+                except TimeoutError:
+                    # Пачка зависла на каком-то файле (процесс уже перезапущен) -
+                    # читаем её по одному файлу, каждый со своим таймаутом
+                    logger.warning("exiftool не ответил на пачку из %d видео, читаем по одному",
+                                   len(chunk))
+                    for path in chunk:
+                        date_obj = extract_date_from_video_exiftool(path)
+                        if date_obj is not None:
+                            dates[path] = date_obj
+                    continue
+                if not stdout.strip():
+                    continue
+                try:
+                    data = json.loads(stdout)
+                except json.JSONDecodeError as e:
+                    logger.debug("Ошибка парсинга JSON от exiftool: %s", e)
+                    continue
+                for metadata in data:
+                    source = metadata.get('SourceFile', '')
+                    path = by_source.get(source, source)
+                    date_obj = _date_from_video_metadata(metadata)
+                    if date_obj is not None:
+                        dates[path] = date_obj
+    except Exception as e:
+        logger.warning("Ошибка пакетного чтения метаданных видео: %s", e)
+    
+    logger.debug("Даты найдены в метаданных %d из %d видео", len(dates), len(paths))
+    return dates
+
+
+# Функция чтения даты для каждого расширения: один поиск в словаре вместо
+# последовательных проверок is_photo / is_video
+METADATA_DISPATCH: Dict[str, Callable[[str], Optional[datetime]]] = {
+    **{ext: extract_date_from_exif for ext in PHOTO_EXTENSIONS},
+    **{ext: extract_date_from_exif_fast for ext in FAST_EXIF_EXTENSIONS},
+    **{ext: extract_date_from_video_exiftool for ext in VIDEO_EXTENSIONS},
+}
+
+
+def extract_date_from_metadata(file_path: str, ext: Optional[str] = None) -> Optional[datetime]:
     """
     Универсальная функция для извлечения даты из метаданных файла.
     Автоматически определяет тип файла и использует соответствующий метод.
     
     Args:
         file_path: Путь к медиа файлу
+        ext: Расширение файла (_ext), если вызывающий код уже его вычислил
         
     Returns:
         Объект datetime или None
     """
-    filename = os.path.basename(file_path)
+    if ext is None:
+        ext = _ext(os.path.basename(file_path))
     
-    if is_photo(filename):
-        return extract_date_from_exif(file_path)
-    elif is_video(filename):
-        return extract_date_from_video_exiftool(file_path)
-    else:
-        logger.debug(f"Неизвестный тип файла: {filename}")
+    handler = METADATA_DISPATCH.get(ext)
+    if handler is None:
+        logger.debug("Неизвестный тип файла: %s", file_path)
         return None
+    return handler(file_path)
 
 
 # Проверка доступности библиотек
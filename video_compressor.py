@@ -1,66 +1,375 @@
 import os
+import json
+import platform
 import subprocess
 import shutil
 import re
-from typing import List, Tuple, Optional
+import queue
+import threading
+import time
+from functools import lru_cache
+from collections import namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+from typing import Iterator, List, Tuple, Optional
 from tqdm import tqdm
 from colorama import Fore, Style
 
-# Paths to binaries - try to use specific paths first, then fallback to system path
-FFMPEG_PATH = "/opt/homebrew/bin/ffmpeg"
-if not os.path.exists(FFMPEG_PATH):
-    FFMPEG_PATH = shutil.which("ffmpeg")
+from metadata_reader import ExifToolDaemon
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# ffprobe output is parsed straight from bytes (json.loads accepts them too)
+_json_loads = orjson.loads if ORJSON_AVAILABLE else json.loads
 
-EXIFTOOL_PATH = "/opt/homebrew/bin/exiftool"
-if not os.path.exists(EXIFTOOL_PATH):
-    EXIFTOOL_PATH = shutil.which("exiftool")
+# Paths to binaries - try to use specific paths first, then fallback to system path
+# (Homebrew on Apple Silicon, Intel Mac / Linux, system)
+BINARY_DIRS = ["/opt/homebrew/bin", "/usr/local/bin", "/usr/bin"]
 
 VIDEO_EXTENSIONS = {'.mp4', '.mov', '.avi', '.mkv', '.m4v'}
 
+# libx264 speed/size trade-off. veryfast is 4-6x faster than medium and gives
+# ~10-15% larger files at the same CRF, partly offset by CRF 23 instead of 22.
+# slow suits archiving (smaller files, several times slower), ultrafast quick previews.
+X264_PRESET = "veryfast"
+X264_PRESETS = {
+    "1": ("veryfast", "быстро, стандартный режим"),
+    "2": ("slow", "медленно, файлы меньше - для архива"),
+    "3": ("ultrafast", "очень быстро, файлы больше - для превью"),
+}
+
+# Software fallback encoder (CPU only)
+SOFTWARE_ENCODER_ARGS = [
+    "-c:v", "libx264",
+    "-crf", "23",
+    "-preset", X264_PRESET,
+    "-pix_fmt", "yuv420p", # Ensure compatibility
+]
+
+# Hardware H.264 encoders to try before libx264, in order of preference.
+# VideoToolbox runs on the media engine of Apple Silicon; NVENC and Quick Sync
+# are the equivalents on NVIDIA and Intel GPUs. VAAPI is not listed: it needs
+# a device and an hwupload filter chain that differ from machine to machine.
+HARDWARE_ENCODERS = {
+    ("Darwin", "arm64"): [
+        ["-c:v", "h264_videotoolbox", "-q:v", "55", "-tag:v", "avc1", "-pix_fmt", "yuv420p"],
+    ],
+    "default": [
+        ["-c:v", "h264_nvenc", "-preset", "p5", "-rc", "vbr", "-cq", "23", "-b:v", "0", "-pix_fmt", "yuv420p"],
+        ["-c:v", "h264_qsv", "-global_quality", "23", "-preset", "medium", "-pix_fmt", "nv12"],
+    ],
+}
+
+# Time limit for one ffprobe run (seconds)
+PROBE_TIMEOUT = 5
+
+# Time limit for copying tags with the shared exiftool process. exiftool rewrites
+# the whole compressed file, so the limit grows with its size: a base plus the
+# time to write it at METADATA_COPY_MIN_RATE bytes/s (a slow disk)
+METADATA_COPY_TIMEOUT = 60
+METADATA_COPY_MIN_RATE = 10 * 1024 ** 2
+
+# With auto-delete on, videos already encoded below these bitrates (bit/s) are
+# not compressed: the encode is rarely smaller, so the result would be deleted
+# anyway. Keyed by the selected encoder; the libx264 limits are for CRF 23 at the
+# default veryfast preset. Hardware encoders have no entry (their output size at
+# a given quality varies too much between chips), so nothing is skipped for them
+SHRINK_BITRATE_LIMITS = {
+    "libx264": {
+        "hevc": 8_000_000,
+        "h264": 4_000_000,
+    },
+}
+
+# Compressed files at least this large have their page cache dropped once finished.
+# ffmpeg writes the output itself: the MP4 muxer seeks back to write the moov atom,
+# so the output cannot be piped to an O_DIRECT / io_uring writer in Python.
+LARGE_OUTPUT_SIZE = 2 * 1024 ** 3
+
+# Sources whose metadata ffmpeg carries over by itself (-map_metadata 0 with
+# -movflags use_metadata_tags); other containers still go through exiftool
+FFMPEG_METADATA_EXTENSIONS = {'.mp4', '.mov'}
+
+# Input duration in ffmpeg's log: Duration: 00:01:23.45
+DURATION_PATTERN = re.compile(rb"Duration:\s+(\d\d):(\d\d):(\d\d)\.(\d\d)")
+
+# Progress bar formats: one bar per file being encoded and one for the whole run
+FILE_BAR_FORMAT = (
+    f'{Fore.CYAN}{{desc}}{Style.RESET_ALL}: '
+    f'{Fore.GREEN}{{percentage:3.0f}}%{Style.RESET_ALL} '
+    f'|{{bar}}| '
+    f'[{Fore.MAGENTA}{{elapsed}}<{{remaining}}{Style.RESET_ALL}, {{rate_fmt}}]'
+)
+TOTAL_BAR_FORMAT = (
+    f'{Fore.CYAN}{{desc}}{Style.RESET_ALL}: '
+    f'{Fore.GREEN}{{percentage:3.0f}}%{Style.RESET_ALL} '
+    f'|{{bar}}| '
+    f'{Fore.YELLOW}{{n_fmt}}/{{total_fmt}}{Style.RESET_ALL} '
+    f'[{Fore.MAGENTA}{{elapsed}}<{{remaining}}{Style.RESET_ALL}]'
+)
+
+# Directory listings from previous scans: path -> [mtime_ns, subdirs, [name, size, output_name]]
+SCAN_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "photos_by_date", "scan.json")
+
+# Directories modified less than this many seconds ago are not cached: on
+# filesystems with coarse timestamps a second change within the same tick
+# would leave the mtime unchanged
+SCAN_CACHE_MIN_AGE = 2.0
+
+# A video found by the scan: everything the compression loop needs about it
+VideoToCompress = namedtuple("VideoToCompress", ["input_path", "name", "size", "output_path"])
+
+# Serializes commands to the shared exiftool -stay_open process
+_exiftool_lock = threading.Lock()
+
+# Parallel ffmpeg jobs for a hardware encoder (the media engine is shared,
+# more sessions only queue up on it; NVENC also limits sessions on consumer cards)
+HARDWARE_ENCODER_WORKERS = 2
+
+# Encoder arguments chosen by get_encoder_args() (probed once per run)
+_encoder_args: Optional[List[str]] = None
+
+@lru_cache(maxsize=None)
+def _find_binary(name: str) -> Optional[str]:
+    """Find a binary: the known directories first, then PATH. Looked up once per name."""
+    for directory in BINARY_DIRS:
+        path = os.path.join(directory, name)
+        if os.access(path, os.X_OK):
+            return path
+    return shutil.which(name)
+
+def _ffmpeg_path() -> Optional[str]:
+    """Path to ffmpeg, or None if it is not installed."""
+    return _find_binary("ffmpeg")
+
+def _exiftool_path() -> Optional[str]:
+    """Path to exiftool, or None if it is not installed."""
+    return _find_binary("exiftool")
+
+@lru_cache(maxsize=None)
 def check_dependencies() -> Tuple[bool, str]:
     """Check if ffmpeg and exiftool are available."""
     missing = []
-    if not FFMPEG_PATH:
+    if not _ffmpeg_path():
         missing.append("ffmpeg")
-    if not EXIFTOOL_PATH:
+    if not _exiftool_path():
         missing.append("exiftool")
     
     if missing:
         return False, f"Missing dependencies: {', '.join(missing)}"
     return True, ""
 
-def get_video_duration(file_path: str) -> Optional[float]:
-    """Get video duration in seconds using ffprobe."""
+def _run_ffprobe(args: List[str], file_path: str) -> Optional[dict]:
+    """
+    Run ffprobe with JSON output and return the parsed result (None on failure).
+    Output stays bytes (no text decoding), stderr goes to DEVNULL so a chatty
+    input cannot fill the pipe.
+    """
+    cmd = [_find_binary("ffprobe") or "ffprobe", "-v", "error"] + args + ["-print_format", "json", file_path]
     try:
-        cmd = [
-            "ffprobe", 
-            "-v", "error", 
-            "-show_entries", "format=duration", 
-            "-of", "default=noprint_wrappers=1:nokey=1", 
-            file_path
-        ]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = subprocess.run(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, timeout=PROBE_TIMEOUT
+        )
         if result.returncode == 0:
-            return float(result.stdout.strip())
-    except:
+            return _json_loads(result.stdout)
+    except (OSError, subprocess.TimeoutExpired, ValueError):
         pass
     return None
 
-def parse_time_to_seconds(time_str: str) -> float:
-    """Parse ffmpeg time string (HH:MM:SS.mm) to seconds."""
+def is_unlikely_to_shrink(file_path: str) -> Optional[str]:
+    """
+    Check the codec and bitrate of the first video stream with ffprobe.
+    Returns a short reason (e.g. "h264, 3.2 Mbps") if compressing the file
+    will most likely not make it smaller, otherwise None.
+    """
+    limits = SHRINK_BITRATE_LIMITS.get(get_encoder_args()[1])
+    if not limits:
+        return None
+
+    info = _run_ffprobe(
+        ["-select_streams", "v:0", "-show_entries", "stream=bit_rate,codec_name"], file_path
+    )
     try:
-        h, m, s = time_str.split(':')
-        return int(h) * 3600 + int(m) * 60 + float(s)
-    except:
-        return 0.0
+        stream = info["streams"][0]
+        codec = stream["codec_name"]
+        bit_rate = int(stream["bit_rate"])
+    except (TypeError, ValueError, KeyError, IndexError):
+        # Unknown codec or bitrate (e.g. MKV has no per-stream bit_rate): compress
+        return None
+
+    limit = limits.get(codec)
+    if limit is not None and bit_rate < limit:
+        return f"{codec}, {bit_rate / 1_000_000:.1f} Mbps"
+    return None
+
+def _encoder_works(encoder_args: List[str]) -> bool:
+    """Encode a few synthetic frames to check that the encoder (and its hardware) really works."""
+    cmd = [
+        _ffmpeg_path(), "-hide_banner", "-loglevel", "error",
+        "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+    ] + encoder_args + ["-f", "null", "-"]
+    try:
+        return subprocess.run(cmd, capture_output=True, timeout=30).returncode == 0
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+
+def get_encoder_args() -> List[str]:
+    """
+    Return ffmpeg video encoder arguments: a working hardware H.264 encoder
+    if this machine has one, otherwise libx264. The probe runs once per process.
+    """
+    global _encoder_args
+    if _encoder_args is not None:
+        return _encoder_args
+
+    _encoder_args = SOFTWARE_ENCODER_ARGS
+    if not _ffmpeg_path():
+        return _encoder_args
+
+    candidates = HARDWARE_ENCODERS.get(
+        (platform.system(), platform.machine()), HARDWARE_ENCODERS["default"]
+    )
+    try:
+        listing = subprocess.run(
+            [_ffmpeg_path(), "-hide_banner", "-encoders"],
+            capture_output=True, text=True, timeout=30
+        ).stdout
+    except (OSError, subprocess.TimeoutExpired):
+        return _encoder_args
+
+    for encoder_args in candidates:
+        # Encoder name follows "-c:v"; a build may list it without the hardware present
+        if encoder_args[1] in listing and _encoder_works(encoder_args):
+            _encoder_args = encoder_args
+            break
+    return _encoder_args
+
+def get_compress_workers(video_count: int) -> int:
+    """
+    Number of videos to compress at once. One libx264 encode rarely
+    saturates all cores on short clips, so half the cores run an encode each.
+    """
+    if get_encoder_args() is SOFTWARE_ENCODER_ARGS:
+        workers = max(1, (os.cpu_count() or 1) // 2)
+    else:
+        workers = HARDWARE_ENCODER_WORKERS
+    return max(1, min(workers, video_count))
+
+def _read_ffmpeg_stderr(stream, pbar: tqdm, lines: List[bytes]):
+    """
+    Collect ffmpeg's stderr (shown if encoding fails) and set the progress bar
+    total from the input duration ffmpeg prints before encoding starts.
+    The pipe is read as bytes: nothing is decoded unless it is shown.
+    """
+    for line in iter(stream.readline, b""):
+        lines.append(line)
+        if pbar.total is None and b"Duration:" in line:
+            match = DURATION_PATTERN.search(line)
+            if match:
+                h, m, sec, cs = map(int, match.groups())
+                pbar.reset(total=h * 3600 + m * 60 + sec + cs / 100)
+
+def _run_ffmpeg_quiet(ffmpeg_cmd: List[str]) -> Tuple[int, bytes]:
+    """
+    Run ffmpeg without a progress bar: only errors are logged (-loglevel error),
+    so there is almost no output to read. Returns (returncode, stderr).
+    """
+    cmd = ffmpeg_cmd[:1] + ["-loglevel", "error"] + ffmpeg_cmd[1:]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, check=False)
+    return result.returncode, result.stderr
+
+def _run_ffmpeg_with_progress(ffmpeg_cmd: List[str], pbar: tqdm) -> Tuple[int, bytes]:
+    """
+    Run ffmpeg and move the progress bar along. Returns (returncode, stderr).
+    """
+    # Progress comes as key=value blocks on stdout (-progress pipe:1, about
+    # twice a second), log and errors on stderr
+    cmd = ffmpeg_cmd[:1] + ["-progress", "pipe:1"] + ffmpeg_cmd[1:]
+    process = subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+
+    # stderr is drained in a separate thread so the pipe never fills up;
+    # it also gives the duration for the progress bar
+    stderr_lines: List[bytes] = []
+    stderr_thread = threading.Thread(
+        target=_read_ffmpeg_stderr, args=(process.stderr, pbar, stderr_lines), daemon=True
+    )
+    stderr_thread.start()
+
+    last_time = 0.0
+
+    for line in iter(process.stdout.readline, b""):
+        if line.startswith(b"out_time_us="):
+            try:
+                current_seconds = int(line[12:]) / 1_000_000
+            except ValueError:
+                continue  # out_time_us=N/A before the first frame
 
-def compress_video_file(input_path: str, output_path: str, pbar: Optional[tqdm] = None) -> Tuple[bool, int, int]:
+            # Update progress bar with the difference
+            increment = current_seconds - last_time
+            if increment > 0:
+                pbar.update(increment)
+                last_time = current_seconds
+
+    process.wait()
+    stderr_thread.join()
+    return process.returncode, b"".join(stderr_lines)
+
+def copy_metadata(input_path: str, output_path: str,
+                  exiftool: Optional[ExifToolDaemon] = None) -> Tuple[bool, str]:
+    """
+    Copy all tags from the original video to the compressed one.
+    Uses the running ExifToolDaemon if given, otherwise a separate exiftool process.
+    Returns (success, exiftool errors).
+    """
+    args = ["-tagsFromFile", input_path, "-all:all", output_path, "-overwrite_original"]
+
+    if exiftool is None:
+        result = subprocess.run([_exiftool_path()] + args, capture_output=True, text=True)
+        return result.returncode == 0, result.stderr
+
+    try:
+        timeout = METADATA_COPY_TIMEOUT + os.path.getsize(output_path) / METADATA_COPY_MIN_RATE
+    except OSError:
+        timeout = METADATA_COPY_TIMEOUT
+
+    with _exiftool_lock:
+        try:
+            _, stderr = exiftool.execute(*args, timeout=timeout)
+        except (OSError, RuntimeError) as e:
+            # The process hung or died; it is restarted on the next command.
+            # A write cut short leaves exiftool's temporary copy next to the output
+            exiftool.kill()
+            try:
+                os.remove(output_path + "_exiftool_tmp")
+            except OSError:
+                pass
+            return False, str(e)
+
+    errors = [line for line in stderr.splitlines() if line.startswith("Error")]
+    return not errors, "\n".join(errors)
+
+def compress_video_file(input_path: str, output_path: str, pbar: Optional[tqdm] = None,
+                        threads: int = 0,
+                        exiftool: Optional[ExifToolDaemon] = None,
+                        copy_tags: bool = True,
+                        preset: Optional[str] = None) -> Tuple[bool, int, int]:
     """
     Compress a video file using ffmpeg and copy metadata using exiftool.
     Updates the provided progress bar if given.
+    threads limits ffmpeg's own threads when several files are encoded at once (0 = auto).
+    exiftool is a running ExifToolDaemon shared between files (None = separate exiftool run).
+    With copy_tags=False only the encode runs; finish_compressed_video does the rest.
+    preset overrides the libx264 preset (ignored for hardware encoders).
     Returns (success, original_size, compressed_size).
     """
-    if not FFMPEG_PATH or not EXIFTOOL_PATH:
+    if not _ffmpeg_path() or not _exiftool_path():
         return False, 0, 0
 
     # Get original file size
@@ -68,95 +377,222 @@ def compress_video_file(input_path: str, output_path: str, pbar: Optional[tqdm]
 
     try:
         # 1. Compress with ffmpeg
-        # Added -pix_fmt yuv420p for better compatibility (QuickTime etc)
-        # Added -progress pipe:1 to get progress info on stdout
+        # Encoder args include -pix_fmt for better compatibility (QuickTime etc)
+        encoder_args = get_encoder_args()
+        if preset and encoder_args is SOFTWARE_ENCODER_ARGS:
+            encoder_args = list(encoder_args)
+            encoder_args[encoder_args.index("-preset") + 1] = preset
+
         ffmpeg_cmd = [
-            FFMPEG_PATH,
+            _ffmpeg_path(),
             "-y", # Overwrite output file if exists
             "-i", input_path,
-            "-c:v", "libx264",
-            "-crf", "22",
-            "-preset", "medium",
-            "-pix_fmt", "yuv420p", # Ensure compatibility
+        ] + encoder_args + [
+            "-threads", str(threads),
             "-c:a", "aac",
             "-b:a", "128k",
             "-map_metadata", "0",
+            # Keep QuickTime metadata keys (creation date, location, device)
+            "-movflags", "+use_metadata_tags",
+            "-nostats",
             output_path
         ]
-        
-        # Run ffmpeg with Popen to capture stderr for progress
-        # ffmpeg outputs progress to stderr by default
-        process = subprocess.Popen(
-            ffmpeg_cmd,
-            stderr=subprocess.PIPE,
-            universal_newlines=True
-        )
 
-        # Regex to extract time from ffmpeg output: time=00:00:05.20
-        time_pattern = re.compile(r"time=(\d{2}:\d{2}:\d{2}\.\d{2})")
-        
-        last_time = 0.0
-        
-        # Read stderr line by line
-        while True:
-            line = process.stderr.readline()
-            if not line and process.poll() is not None:
-                break
-            
-            if line and pbar:
-                match = time_pattern.search(line)
-                if match:
-                    current_time_str = match.group(1)
-                    current_seconds = parse_time_to_seconds(current_time_str)
-                    
-                    # Update progress bar with the difference
-                    increment = current_seconds - last_time
-                    if increment > 0:
-                        pbar.update(increment)
-                        last_time = current_seconds
-
-        if process.returncode != 0:
-            print(f"\n{Fore.RED}FFmpeg error for {input_path}{Style.RESET_ALL}")
+        if pbar is None:
+            returncode, stderr = _run_ffmpeg_quiet(ffmpeg_cmd)
+        else:
+            returncode, stderr = _run_ffmpeg_with_progress(ffmpeg_cmd, pbar)
+
+        if returncode != 0:
+            tqdm.write(f"{Fore.RED}FFmpeg error for {input_path}{Style.RESET_ALL}")
+            tail = stderr.decode("utf-8", "replace").rstrip().splitlines()[-5:]
+            tqdm.write("\n".join(tail))
             return False, original_size, 0
 
+        # ffmpeg read the source once from start to end and will not read it
+        # again: free its pages for the inputs of concurrent encodes
+        _drop_page_cache(input_path)
+
         # Verify output file exists and has size
-        if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
-            print(f"\n{Fore.RED}FFmpeg failed to create valid file: {output_path}{Style.RESET_ALL}")
+        compressed_size = _file_size(output_path)
+        if compressed_size == 0:
+            tqdm.write(f"{Fore.RED}FFmpeg failed to create valid file: {output_path}{Style.RESET_ALL}")
             return False, original_size, 0
 
-        compressed_size = os.path.getsize(output_path)
+    except Exception as e:
+        _discard_output(input_path, output_path, e)
+        return False, original_size, 0
 
-        # 2. Copy metadata with exiftool
-        exiftool_cmd = [
-            EXIFTOOL_PATH,
-            "-tagsFromFile", input_path,
-            "-all:all",
-            output_path,
-            "-overwrite_original"
-        ]
-        
-        result = subprocess.run(exiftool_cmd, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            print(f"\n{Fore.YELLOW}Exiftool warning for {input_path}:{Style.RESET_ALL}")
-            print(result.stderr)
-            if not os.path.exists(output_path) or os.path.getsize(output_path) == 0:
-                 print(f"\n{Fore.RED}Exiftool corrupted the file: {output_path}{Style.RESET_ALL}")
-                 return False, original_size, 0
-            return True, original_size, compressed_size
+    if not copy_tags:
+        return True, original_size, compressed_size
+
+    # 2. Copy metadata with exiftool
+    return finish_compressed_video(input_path, output_path, original_size, compressed_size, exiftool)
+
+def finish_compressed_video(input_path: str, output_path: str, original_size: int,
+                            compressed_size: int,
+                            exiftool: Optional[ExifToolDaemon] = None) -> Tuple[bool, int, int]:
+    """
+    Second step of compress_video_file: copy metadata to the encoded file
+    (not needed for MP4/MOV sources, ffmpeg has already kept their tags).
+    Returns (success, original_size, compressed_size).
+    """
+    try:
+        if os.path.splitext(input_path)[1].lower() not in FFMPEG_METADATA_EXTENSIONS:
+            copied, exiftool_errors = copy_metadata(input_path, output_path, exiftool)
+            
+            if not copied:
+                tqdm.write(f"{Fore.YELLOW}Exiftool warning for {input_path}:{Style.RESET_ALL}")
+                tqdm.write(exiftool_errors)
+                if _file_size(output_path) == 0:
+                     tqdm.write(f"{Fore.RED}Exiftool corrupted the file: {output_path}{Style.RESET_ALL}")
+                     return False, original_size, 0
+                return True, original_size, compressed_size
+
+        # Several gigabytes of fresh output would otherwise push the other
+        # encodes' input out of the page cache
+        if compressed_size >= LARGE_OUTPUT_SIZE:
+            _drop_page_cache(output_path)
 
         return True, original_size, compressed_size
 
     except Exception as e:
-        print(f"\n{Fore.RED}Exception processing {input_path}:{Style.RESET_ALL} {e}")
-        # Try to cleanup bad output
-        if os.path.exists(output_path):
-            try:
-                os.remove(output_path)
-            except:
-                pass
+        _discard_output(input_path, output_path, e)
         return False, original_size, 0
 
+def _file_size(path: str) -> int:
+    """File size from a single stat call; 0 if the file does not exist."""
+    try:
+        return os.stat(path).st_size
+    except FileNotFoundError:
+        return 0
+
+def _drop_page_cache(path: str):
+    """
+    Tell the kernel the file's cached pages will not be read again
+    (POSIX_FADV_DONTNEED starts writeback and frees the clean pages).
+    The page cache belongs to the file, so this works from our own descriptor;
+    read-ahead hints like POSIX_FADV_SEQUENTIAL do not, they only apply to the
+    descriptor they are set on, and ffmpeg opens the file itself.
+    """
+    if not hasattr(os, "posix_fadvise"):
+        return
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+def _replace_original(output_path: str, input_path: str):
+    """
+    Put the compressed file in place of the original.
+    os.replace is atomic: at any moment one of the two files exists under the
+    original name. If the filesystem refuses the rename (some network mounts),
+    the data is copied over the original and synced before -small is removed.
+    """
+    try:
+        os.replace(output_path, input_path)
+    except OSError:
+        shutil.copyfile(output_path, input_path)
+        with open(input_path, "rb") as f:
+            os.fsync(f.fileno())
+        os.unlink(output_path)
+
+def _discard_output(input_path: str, output_path: str, error: Exception):
+    """Report an unexpected error and remove the unfinished output."""
+    tqdm.write(f"{Fore.RED}Exception processing {input_path}:{Style.RESET_ALL} {error}")
+    # Try to cleanup bad output
+    try:
+        os.remove(output_path)
+    except OSError:
+        pass
+
+def load_scan_cache() -> dict:
+    """Load the directory listings saved by the previous scan."""
+    try:
+        with open(SCAN_CACHE_PATH, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_scan_cache(scan_cache: dict):
+    """Save directory listings for the next scan."""
+    try:
+        os.makedirs(os.path.dirname(SCAN_CACHE_PATH), exist_ok=True)
+        with open(SCAN_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(scan_cache, f)
+    except OSError:
+        pass
+
+def iter_videos_to_compress(directory: str,
+                            scan_cache: Optional[dict] = None) -> Iterator[VideoToCompress]:
+    """
+    Recursively find videos that have no compressed copy yet.
+    Uses os.scandir: the entry's cached stat gives the size without a separate
+    getsize call, and "-small" copies are looked up among the names already listed.
+
+    With scan_cache, a directory whose mtime has not changed since the last scan
+    (no files added, removed or renamed in it) is not listed again: its
+    subdirectories and candidate videos are taken from the cache.
+    Yields VideoToCompress(input_path, name, size, expected_output).
+    """
+    try:
+        # Taken before listing: a change made during the scan will not match next time
+        st = os.stat(directory)
+    except OSError:
+        return
+
+    cached = scan_cache.get(directory) if scan_cache is not None else None
+    if cached is not None and cached[0] == st.st_mtime_ns:
+        _, subdirs, videos = cached
+    else:
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            return
+
+        subdirs = []
+        videos = []
+        names = {entry.name for entry in entries}
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.name)
+                    continue
+
+                name_without_ext, ext = os.path.splitext(entry.name)
+
+                # Skip non-video files
+                if ext.lower() not in VIDEO_EXTENSIONS or not entry.is_file():
+                    continue
+
+                # Skip already compressed files
+                if entry.name.endswith("-small.mp4"):
+                    continue
+
+                # Check if compressed version already exists
+                output_name = f"{name_without_ext}-small.mp4"
+                if output_name in names:
+                    continue
+
+                videos.append([entry.name, entry.stat().st_size, output_name])
+            except OSError:
+                continue
+
+        if scan_cache is not None and time.time() - st.st_mtime > SCAN_CACHE_MIN_AGE:
+            scan_cache[directory] = [st.st_mtime_ns, subdirs, videos]
+
+    for name, size, output_name in videos:
+        yield VideoToCompress(
+            os.path.join(directory, name), name, size, os.path.join(directory, output_name)
+        )
+    for subdir in subdirs:
+        yield from iter_videos_to_compress(os.path.join(directory, subdir), scan_cache)
+
 def scan_and_compress(directory: str):
     """
     Recursively scan directory for videos and compress them.
@@ -170,37 +606,22 @@ def scan_and_compress(directory: str):
 
     print(f"\n{Fore.CYAN}Scanning for videos in: {directory}{Style.RESET_ALL}")
     
-    videos_to_process = []
-    
-    # Walk through directory
-    for root, _, files in os.walk(directory):
-        for file in files:
-            file_path = os.path.join(root, file)
-            ext = os.path.splitext(file)[1].lower()
-            
-            # Skip non-video files
-            if ext not in VIDEO_EXTENSIONS:
-                continue
-                
-            # Skip already compressed files
-            if file.endswith("-small.mp4"):
-                continue
-                
-            # Check if compressed version already exists
-            name_without_ext = os.path.splitext(file)[0]
-            expected_output = os.path.join(root, f"{name_without_ext}-small.mp4")
-            
-            if os.path.exists(expected_output):
-                continue
-                
-            videos_to_process.append((file_path, expected_output))
+    # Directories unchanged since the last run are taken from the scan cache
+    scan_cache = load_scan_cache()
+    videos_to_process = list(iter_videos_to_compress(os.path.abspath(directory), scan_cache))
+    save_scan_cache(scan_cache)
+
+    # Largest first (LPT): a big file started last would leave one worker
+    # encoding alone at the end while small files backfill idle workers instead
+    videos_to_process.sort(key=lambda video: video.size, reverse=True)
             
     if not videos_to_process:
         print(f"{Fore.YELLOW}No new videos found to compress.{Style.RESET_ALL}")
         return
 
     total_files = len(videos_to_process)
-    print(f"Found {total_files} videos to compress.\n")
+    print(f"Found {total_files} videos to compress.")
+    print(f"Video encoder: {get_encoder_args()[1]}\n")
     
     # Ask user about auto-delete
     while True:
@@ -220,80 +641,132 @@ def scan_and_compress(directory: str):
             break
         else:
             print(f"{Fore.RED}⚠️  Неверный выбор. Введите 1 или 2.{Style.RESET_ALL}\n")
+
+    # Ask user about libx264 speed (hardware encoders have no such choice)
+    preset = X264_PRESET
+    while get_encoder_args() is SOFTWARE_ENCODER_ARGS:
+        print("Скорость сжатия:")
+        for key, (name, description) in X264_PRESETS.items():
+            print(f"  {key} - {Fore.GREEN}{name}{Style.RESET_ALL} ({description})")
+
+        preset_choice = input("\nВаш выбор (1, 2 или 3, Enter - 1): ").strip() or "1"
+
+        if preset_choice in X264_PRESETS:
+            preset = X264_PRESETS[preset_choice][0]
+            print(f"✓ Пресет: {Fore.GREEN}{preset}{Style.RESET_ALL}\n")
+            break
+        print(f"{Fore.RED}⚠️  Неверный выбор. Введите 1, 2 или 3.{Style.RESET_ALL}\n")
     
-    # Process videos
+    # Process videos in parallel: one overall bar by files plus one bar per worker
+    workers = get_compress_workers(total_files)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    slots = queue.Queue()
+    for position in range(1, workers + 1):
+        slots.put(position)
+
+    def compress_with_bar(video: VideoToCompress):
+        """
+        Encode one video in a worker thread, showing its own progress bar.
+        Metadata copying is handed to metadata_executor so the worker can start
+        the next encode right away. Returns the result tuple or its Future,
+        or None if the video was skipped.
+        """
+        input_path, filename, size, output_path = video
+        file_size_mb = size / (1024 * 1024)
+
+        # The compressed copy would be deleted anyway if it is not smaller
+        if auto_delete:
+            reason = is_unlikely_to_shrink(input_path)
+            if reason:
+                tqdm.write(f"{Fore.YELLOW}Пропущен {filename}: сжатие вряд ли уменьшит размер ({reason}){Style.RESET_ALL}")
+                return None
+
+        # The bar has no total until ffmpeg reports the duration
+        position = slots.get()
+        try:
+            with tqdm(total=None,
+                      unit='s',
+                      desc=f"{filename} ({file_size_mb:.1f}MB)",
+                      bar_format=FILE_BAR_FORMAT,
+                      position=position,
+                      leave=False,
+                      colour='green') as pbar:
+                encoded = compress_video_file(
+                    input_path, output_path, pbar, threads, copy_tags=False, preset=preset
+                )
+        finally:
+            slots.put(position)
+
+        success, original_size, compressed_size = encoded
+        if not success:
+            return encoded
+        return metadata_executor.submit(
+            finish_compressed_video, input_path, output_path, original_size, compressed_size, exiftool
+        )
+
     success_count = 0
     fail_count = 0
+    skipped_count = 0
     deleted_originals = 0
     deleted_compressed = 0
-    
-    for idx, (input_path, output_path) in enumerate(videos_to_process, 1):
-        filename = os.path.basename(input_path)
-        
-        # Skip if input file no longer exists (e.g., was deleted in previous iteration)
-        if not os.path.exists(input_path):
-            continue
-        
-        # Get file size for display
-        file_size_mb = os.path.getsize(input_path) / (1024 * 1024)
-        
-        # Get duration for progress bar
-        duration = get_video_duration(input_path)
-        if not duration:
-            duration = 100 # Fallback if duration unknown
-            
-        # Create progress bar for this file
-        # Format: Compressing: filename (123.4MB): 20%|...| 8/40 [time, rate]
-        bar_format = (
-            f'{Fore.CYAN}{{desc}}{Style.RESET_ALL}: '
-            f'{Fore.GREEN}{{percentage:3.0f}}%{Style.RESET_ALL} '
-            f'|{{bar}}| '
-            f'{Fore.YELLOW}{idx}/{total_files}{Style.RESET_ALL} '
-            f'[{Fore.MAGENTA}{{elapsed}}<{{remaining}}{Style.RESET_ALL}, {{rate_fmt}}]'
-        )
-        
-        with tqdm(total=duration, 
-                  unit='s', 
-                  desc=f"Compressing: {filename} ({file_size_mb:.1f}MB)",
-                  bar_format=bar_format,
-                  colour='green') as pbar:
-            
-            success, original_size, compressed_size = compress_video_file(input_path, output_path, pbar)
-        
-        # Process results after closing progress bar
-        if success:
-            success_count += 1
-            
-            # Auto-delete logic
-            if auto_delete:
-                original_mb = original_size / (1024 * 1024)
-                compressed_mb = compressed_size / (1024 * 1024)
-                
-                if compressed_size < original_size:
-                    # Delete original, rename compressed to original name
-                    try:
-                        os.remove(input_path)
-                        # Rename compressed file to original name (remove -small suffix)
-                        os.rename(output_path, input_path)
-                        deleted_originals += 1
-                        print(f"{Fore.GREEN}✓ Заменен оригинал{Style.RESET_ALL} ({original_mb:.1f}MB → {compressed_mb:.1f}MB)")
-                    except Exception as e:
-                        print(f"{Fore.RED}Ошибка замены файла: {e}{Style.RESET_ALL}")
-                else:
-                    # Delete compressed, keep original
-                    try:
-                        os.remove(output_path)
-                        deleted_compressed += 1
-                        print(f"{Fore.YELLOW}✓ Удален сжатый файл{Style.RESET_ALL} (сжатие не уменьшило размер: {original_mb:.1f}MB → {compressed_mb:.1f}MB)")
-                    except Exception as e:
-                        print(f"{Fore.RED}Ошибка удаления сжатого: {e}{Style.RESET_ALL}")
-        else:
-            fail_count += 1
-            
+
+    with tqdm(total=total_files, unit='file', desc="Compressing",
+              bar_format=TOTAL_BAR_FORMAT, position=0) as total_bar, \
+            ExifToolDaemon(_exiftool_path()) as exiftool, \
+            ThreadPoolExecutor(max_workers=1) as metadata_executor, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {}
+        for video in videos_to_process:
+            # Skip if input file no longer exists
+            if not os.path.exists(video.input_path):
+                total_bar.update(1)
+                continue
+            futures[executor.submit(compress_with_bar, video)] = video
+
+        for future in as_completed(futures):
+            input_path, filename, _, output_path = futures[future]
+            result = future.result()
+            if isinstance(result, Future):
+                result = result.result()
+            total_bar.update(1)
+            if result is None:
+                skipped_count += 1
+                continue
+            success, original_size, compressed_size = result
+
+            if success:
+                success_count += 1
+
+                # Auto-delete logic
+                if auto_delete:
+                    original_mb = original_size / (1024 * 1024)
+                    compressed_mb = compressed_size / (1024 * 1024)
+
+                    if compressed_size < original_size:
+                        # Replace original with compressed file (remove -small suffix)
+                        try:
+                            _replace_original(output_path, input_path)
+                            deleted_originals += 1
+                            tqdm.write(f"{Fore.GREEN}✓ Заменен оригинал{Style.RESET_ALL} {filename} ({original_mb:.1f}MB → {compressed_mb:.1f}MB)")
+                        except Exception as e:
+                            tqdm.write(f"{Fore.RED}Ошибка замены файла: {e}{Style.RESET_ALL}")
+                    else:
+                        # Delete compressed, keep original
+                        try:
+                            os.unlink(output_path)
+                            deleted_compressed += 1
+                            tqdm.write(f"{Fore.YELLOW}✓ Удален сжатый файл{Style.RESET_ALL} {os.path.basename(output_path)} (сжатие не уменьшило размер: {original_mb:.1f}MB → {compressed_mb:.1f}MB)")
+                        except Exception as e:
+                            tqdm.write(f"{Fore.RED}Ошибка удаления сжатого: {e}{Style.RESET_ALL}")
+            else:
+                fail_count += 1
+
     print(f"\n{Fore.GREEN}Done!{Style.RESET_ALL}")
     print(f"Successfully compressed: {success_count}")
     if fail_count > 0:
         print(f"{Fore.RED}Failed: {fail_count}{Style.RESET_ALL}")
+    if skipped_count > 0:
+        print(f"{Fore.YELLOW}Skipped (unlikely to shrink): {skipped_count}{Style.RESET_ALL}")
     
     if auto_delete:
         print(f"\n{Fore.CYAN}Статистика удаления:{Style.RESET_ALL}")